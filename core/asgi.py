@@ -18,6 +18,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django.setup()
 
 import miniapp.routing
+from core.lifespan import lifespan_app
 
 application = ProtocolTypeRouter(
     {
@@ -25,5 +26,6 @@ application = ProtocolTypeRouter(
         "websocket": AuthMiddlewareStack(
             URLRouter(miniapp.routing.websocket_urlpatterns)
         ),
+        "lifespan": lifespan_app,
     }
 )
@@ -0,0 +1,74 @@
+# core/cache.py
+"""
+Django cache backend: the stock Redis backend plus Prometheus metrics per
+key prefix (the part of the key before the first ":"), exported by the
+/metrics view when METRICS_ENABLED is on.
+"""
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+from prometheus_client import Counter, Histogram
+
+CACHE_REQUESTS = Counter(
+    "django_cache_requests_total",
+    "Cache reads by key prefix and result",
+    ["prefix", "result"],
+)
+CACHE_LATENCY = Histogram(
+    "django_cache_latency_seconds",
+    "Cache operation latency by key prefix",
+    ["prefix", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+
+_MISSING = object()
+
+
+def key_prefix(key) -> str:
+    return str(key).split(":", 1)[0]
+
+
+class InstrumentedRedisCache(RedisCache):
+
+    def _observe(self, operation, key, started):
+        CACHE_LATENCY.labels(key_prefix(key), operation).observe(
+            time.perf_counter() - started
+        )
+
+    def get(self, key, default=None, version=None):
+        started = time.perf_counter()
+        value = super().get(key, _MISSING, version)
+        self._observe("get", key, started)
+        hit = value is not _MISSING
+        CACHE_REQUESTS.labels(key_prefix(key), "hit" if hit else "miss").inc()
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        started = time.perf_counter()
+        found = super().get_many(keys, version)
+        if keys:
+            self._observe("get_many", keys[0], started)
+        for key in keys:
+            CACHE_REQUESTS.labels(
+                key_prefix(key), "hit" if key in found else "miss"
+            ).inc()
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        started = time.perf_counter()
+        super().set(key, value, timeout, version)
+        self._observe("set", key, started)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        started = time.perf_counter()
+        added = super().add(key, value, timeout, version)
+        self._observe("add", key, started)
+        return added
+
+    def delete(self, key, version=None):
+        started = time.perf_counter()
+        deleted = super().delete(key, version)
+        self._observe("delete", key, started)
+        return deleted
@@ -0,0 +1,33 @@
+# core/lifespan.py
+"""ASGI lifespan: open process-wide clients on startup, close them on shutdown."""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def lifespan_app(scope, receive, send):
+    from django.conf import settings
+
+    from telegram.instance.bot_registry import bot_registry
+    from telegram.instance.update_queue import update_queue
+
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await bot_registry.startup()
+                if settings.TELEGRAM_QUEUE_UPDATES:
+                    await update_queue.start()
+            except Exception as exc:
+                logger.exception("Startup failed")
+                await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                # queued updates still need the bot session
+                await update_queue.close(settings.TELEGRAM_UPDATE_DRAIN_TIMEOUT)
+                await bot_registry.close()
+            finally:
+                await send({"type": "lifespan.shutdown.complete"})
+            return
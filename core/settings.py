@@ -96,6 +96,28 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Django cache shared by all backend and worker processes, on its own DB.
+# Bump CACHE_VERSION to orphan every key after an incompatible change.
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.InstrumentedRedisCache",
+        "LOCATION": os.getenv("CACHE_REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/4"),
+        "KEY_PREFIX": "ewa",
+        "VERSION": int(os.getenv("CACHE_VERSION", "1")),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "3600")),
+        "OPTIONS": {
+            "pool_class": "redis.BlockingConnectionPool",
+            "max_connections": int(os.getenv("CACHE_MAX_CONNECTIONS", "50")),
+            "timeout": 5,  # wait for a free pooled connection
+            "socket_timeout": 0.5,
+            "socket_connect_timeout": 0.5,
+            "health_check_interval": 30,
+        },
+    }
+}
+# /metrics (Prometheus text format) for cache hit/miss/latency
+METRICS_ENABLED = bool(int(os.getenv("METRICS_ENABLED", "0")))
+
 
 DATABASES = {
     "default": {
@@ -171,9 +193,129 @@ LOGGING = {
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 BOT_HOST = os.getenv("BOT_HOST", BACKEND_ORIGIN)  # e.g., https://apiewa.divspan.uz
 BOT_WEBHOOK_URL = f"{BOT_HOST}/telegram/webhook/{BOT_TOKEN.split(':', 1)[0]}/updates/"
+# shared aiohttp session of the process-wide bot (telegram.instance.bot_registry)
+TELEGRAM_HTTP_POOL_LIMIT = int(os.getenv("TELEGRAM_HTTP_POOL_LIMIT", "100"))
+TELEGRAM_HTTP_TIMEOUT = float(os.getenv("TELEGRAM_HTTP_TIMEOUT", "60"))
+# webhook answers right after queueing the update; a pool of asyncio workers
+# (one chat always on the same worker) runs the dispatcher
+TELEGRAM_QUEUE_UPDATES = bool(int(os.getenv("TELEGRAM_QUEUE_UPDATES", "1")))
+TELEGRAM_UPDATE_WORKERS = int(os.getenv("TELEGRAM_UPDATE_WORKERS", "32"))
+TELEGRAM_UPDATE_QUEUE_SIZE = int(os.getenv("TELEGRAM_UPDATE_QUEUE_SIZE", "50"))
+TELEGRAM_UPDATE_ENQUEUE_TIMEOUT = float(os.getenv("TELEGRAM_UPDATE_ENQUEUE_TIMEOUT", "5"))
+TELEGRAM_UPDATE_DRAIN_TIMEOUT = float(os.getenv("TELEGRAM_UPDATE_DRAIN_TIMEOUT", "20"))
+# a chat is owned by the replica that has its updates queued (Redis lease, so
+# replicas keep a chat's order); the lease expires after this many seconds
+TELEGRAM_CHAT_LEASE_TTL = int(os.getenv("TELEGRAM_CHAT_LEASE_TTL", "300"))
+# seen update_ids are remembered this long (Telegram keeps undelivered updates 24h)
+TELEGRAM_UPDATE_DEDUP_TTL = int(os.getenv("TELEGRAM_UPDATE_DEDUP_TTL", "86400"))
+# BotClient/BotClientSession of a chat cached for the session middleware
+TELEGRAM_SESSION_CACHE_TTL = int(os.getenv("TELEGRAM_SESSION_CACHE_TTL", "30"))
 MINIAPP_URL = os.getenv("MINIAPP_URL", "")
 # GPT config
 GPT_TOKEN = os.getenv("gpt_token", "")
+# stream chat answers to the miniapp as "streaming" deltas (clients may also
+# ask per message with {"stream": true}); deltas are coalesced per interval
+RAG_STREAM_ANSWERS = bool(int(os.getenv("RAG_STREAM_ANSWERS", "0")))
+RAG_STREAM_FLUSH_MS = int(os.getenv("RAG_STREAM_FLUSH_MS", "50"))
+# answer chat-mode messages inside the ASGI process (AsyncOpenAI) instead of
+# Celery; past RAG_ASYNC_MAX_CONCURRENCY in-flight answers, Celery takes over
+RAG_ASYNC_PIPELINE = bool(int(os.getenv("RAG_ASYNC_PIPELINE", "0")))
+RAG_ASYNC_MAX_CONCURRENCY = int(os.getenv("RAG_ASYNC_MAX_CONCURRENCY", "200"))
+
+# Embedding settings
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "multilingual-e5-base")
+# concurrent get_embedding calls are collected for up to MAX_WAIT_MS and encoded together
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+# store unit-length vectors so inner product can replace cosine distance
+EMBEDDING_NORMALIZE = bool(int(os.getenv("EMBEDDING_NORMALIZE", "1")))
+# encoder runtime: torch | onnx (ONNX Runtime, see manage.py export_embedding_onnx)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# ONNX file inside the model directory, e.g. onnx/model_qint8_avx512_vnni.onnx
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model.onnx")
+# where query embeddings are computed: local (batcher thread) | celery (the
+# embeddings queue); processes without the model (ASGI, worker-llm) use celery
+EMBEDDING_OFFLOAD = os.getenv("EMBEDDING_OFFLOAD", "local")
+EMBEDDING_OFFLOAD_TIMEOUT = float(os.getenv("EMBEDDING_OFFLOAD_TIMEOUT", "10"))
+# embedding server (manage.py run_embedding_server); when set, every process
+# encodes through it instead of loading the model
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+# also write the float16 Embedding.embedded_halfvec column
+EMBEDDING_STORE_HALFVEC = bool(int(os.getenv("EMBEDDING_STORE_HALFVEC", "1")))
+# stored on every row; bump it (or change the model) to re-embed in the background.
+# The ONNX runtime (and a quantized file) yields slightly different vectors, so
+# the backend and file are part of the version
+EMBEDDING_MODEL_VERSION = os.getenv("EMBEDDING_MODEL_VERSION", EMBEDDING_MODEL_NAME)
+if EMBEDDING_BACKEND == "onnx":
+    EMBEDDING_MODEL_VERSION = f"{EMBEDDING_MODEL_VERSION}+onnx:{EMBEDDING_ONNX_FILE}"
+
+# rag_system caches live in their own Redis DB
+RAG_REDIS_URL = os.getenv("RAG_REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/3")
+RAG_REDIS_SOCKET_TIMEOUT = float(os.getenv("RAG_REDIS_SOCKET_TIMEOUT", "0.5"))
+
+# Query embedding cache: in-process LRU in front of Redis
+EMBEDDING_CACHE_ENABLED = bool(int(os.getenv("EMBEDDING_CACHE_ENABLED", "1")))
+EMBEDDING_CACHE_MAX_SIZE = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", "2048"))
+EMBEDDING_CACHE_LOCAL_TTL = int(os.getenv("EMBEDDING_CACHE_LOCAL_TTL", "3600"))
+EMBEDDING_CACHE_REDIS_TTL = int(os.getenv("EMBEDDING_CACHE_REDIS_TTL", "86400"))
+
+# Vector search (pgvector ANN index)
+VECTOR_INDEX_KIND = os.getenv("VECTOR_INDEX_KIND", "hnsw")  # hnsw | ivfflat
+# 0 keeps the server default (hnsw.ef_search=40, ivfflat.probes=1)
+VECTOR_SEARCH_EF_SEARCH = int(os.getenv("VECTOR_SEARCH_EF_SEARCH", "0"))
+VECTOR_SEARCH_PROBES = int(os.getenv("VECTOR_SEARCH_PROBES", "0"))
+
+# Retrieval backend for search_documents: pgvector | hybrid | memory
+RAG_SEARCH_BACKEND = os.getenv("RAG_SEARCH_BACKEND", "pgvector")
+# semantic answer cache: reuse the answer of a near-identical earlier question
+# (cosine >= threshold) while the knowledge base and Utils/Roles are unchanged.
+# Only questions without earlier turns in the prompt are looked up or stored.
+# E5 cosines cluster high, so keep the threshold strict.
+RAG_ANSWER_CACHE_ENABLED = bool(int(os.getenv("RAG_ANSWER_CACHE_ENABLED", "0")))
+RAG_ANSWER_CACHE_THRESHOLD = float(os.getenv("RAG_ANSWER_CACHE_THRESHOLD", "0.985"))
+RAG_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", "5000"))
+RAG_ANSWER_CACHE_TTL = int(os.getenv("RAG_ANSWER_CACHE_TTL", "86400"))
+# chunks handed to the LLM per question
+RAG_SEARCH_TOP_K = int(os.getenv("RAG_SEARCH_TOP_K", "5"))
+# prompt token budgets (counted with the local tokenizer): retrieved content
+# is filled best match first, the last chunk truncated if at least
+# RAG_CONTEXT_MIN_CHUNK_TOKENS of it fits; history drops its oldest turns
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "2500"))
+RAG_CONTEXT_MIN_CHUNK_TOKENS = int(os.getenv("RAG_CONTEXT_MIN_CHUNK_TOKENS", "64"))
+RAG_HISTORY_TOKEN_BUDGET = int(os.getenv("RAG_HISTORY_TOKEN_BUDGET", "1500"))
+# skynet role-play: once the unsummarized turns exceed the trigger, a task
+# folds all but the newest SKYNET_SUMMARY_KEEP_TOKENS into a rolling summary
+SKYNET_SUMMARY_TRIGGER_TOKENS = int(os.getenv("SKYNET_SUMMARY_TRIGGER_TOKENS", "3000"))
+SKYNET_SUMMARY_KEEP_TOKENS = int(os.getenv("SKYNET_SUMMARY_KEEP_TOKENS", "1000"))
+# pgvector backend: embedded_vector (cosine) or embedded_halfvec (inner_product)
+RAG_SEARCH_COLUMN = os.getenv("RAG_SEARCH_COLUMN", "embedded_vector")
+RAG_SEARCH_DISTANCE = os.getenv(
+    "RAG_SEARCH_DISTANCE",
+    "inner_product" if RAG_SEARCH_COLUMN == "embedded_halfvec" else "cosine",
+)
+# hybrid backend: candidates taken from each of the vector and full-text
+# lists, and the reciprocal rank fusion constant (60 in the original paper)
+RAG_HYBRID_CANDIDATES = int(os.getenv("RAG_HYBRID_CANDIDATES", "50"))
+RAG_HYBRID_RRF_K = int(os.getenv("RAG_HYBRID_RRF_K", "60"))
+# memory backend: how often to poll the knowledge-base change log (seconds)
+RAG_MEMORY_INDEX_CHECK_INTERVAL = float(
+    os.getenv("RAG_MEMORY_INDEX_CHECK_INTERVAL", "2")
+)
+# memory backend: full reload period while the change log is unavailable
+RAG_MEMORY_INDEX_MAX_AGE = int(os.getenv("RAG_MEMORY_INDEX_MAX_AGE", "300"))
+# changed ids kept in the change log before readers must reload everything
+RAG_KB_CHANGELOG_SIZE = int(os.getenv("RAG_KB_CHANGELOG_SIZE", "10000"))
+
+# Knowledge-base ingestion
+# E5 truncates at 512 tokens; chunks stay below that with room for special tokens
+RAG_CHUNK_MAX_TOKENS = int(os.getenv("RAG_CHUNK_MAX_TOKENS", "480"))
+RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "64"))
+RAG_INGEST_BATCH_SIZE = int(os.getenv("RAG_INGEST_BATCH_SIZE", "256"))  # chunks per encode
+RAG_INGEST_TIME_LIMIT = int(os.getenv("RAG_INGEST_TIME_LIMIT", "21600"))
+# background re-embedding of rows whose text or model version changed
+RAG_REEMBED_INTERVAL = int(os.getenv("RAG_REEMBED_INTERVAL", "600"))  # seconds
+RAG_REEMBED_TIME_LIMIT = int(os.getenv("RAG_REEMBED_TIME_LIMIT", "3600"))
 
 
 # celery settings
@@ -202,21 +344,38 @@ CELERY_RESULT_EXPIRES = 3600  # 1h if you do keep results
 # In your settings.py
 
 # Routing & queues
+# llm: waits on OpenAI -> worker-llm, threads pool, high concurrency, no model
+# embeddings: encodes and writes vectors -> worker-embeddings, prefork (the
+# model is preloaded there unless EMBEDDING_SERVER_URL points at the server)
+# default: long-running bulk work, also on worker-embeddings
 CELERY_TASK_ROUTES = {
-    # Fast queue - all your chat tasks
-    "rag_system.tasks.answer_question": {"queue": "fast"},
-    "rag_system.tasks.change_mode_to_skynet": {"queue": "fast"},
-    "rag_system.tasks.change_mode_to_chat": {"queue": "fast"},
-    "rag_system.tasks.entry_role": {"queue": "fast"},
-    "rag_system.tasks.create_embedding_task": {"queue": "fast"},
-    "rag_system.tasks.save_embedding_with_vector_task": {"queue": "fast"},
-    "rag_system.tasks.create_and_save_embedding_task": {"queue": "fast"},
+    "rag_system.tasks.answer_question": {"queue": "llm"},
+    "rag_system.tasks.change_mode_to_skynet": {"queue": "llm"},
+    "rag_system.tasks.change_mode_to_chat": {"queue": "llm"},
+    "rag_system.tasks.entry_role": {"queue": "llm"},
+    "rag_system.tasks.summarize_skynet_history_task": {"queue": "llm"},
+    "rag_system.tasks.create_embedding_task": {"queue": "embeddings"},
+    "rag_system.tasks.save_embedding_with_vector_task": {"queue": "embeddings"},
+    "rag_system.tasks.create_and_save_embedding_task": {"queue": "embeddings"},
+    "rag_system.tasks.ingest_knowledge_task": {"queue": "default"},
+    "rag_system.tasks.reembed_stale_task": {"queue": "default"},
 }
 
 CELERY_TASK_QUEUES = {
-    "fast": {},
+    "llm": {},
+    "embeddings": {},
     "default": {},
 }
+# unrouted tasks would otherwise go to "celery", which no worker consumes
+CELERY_TASK_DEFAULT_QUEUE = "default"
+
+CELERY_BEAT_SCHEDULE = {
+    "reembed-stale-embeddings": {
+        "task": "rag_system.tasks.reembed_stale_task",
+        "schedule": RAG_REEMBED_INTERVAL,
+        "options": {"expires": RAG_REEMBED_INTERVAL},
+    },
+}
 
 
 ################# unfold
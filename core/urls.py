@@ -3,12 +3,15 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("telegram/", include("telegram.urls")),
     # path("api/", include("rag_system.urls")),
     path("api/v1/clients/", include("miniapp.urls")),
+    path("metrics", metrics),
 ]
 
 if settings.DEBUG:  # only serve static/media this way in dev
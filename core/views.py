@@ -0,0 +1,10 @@
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from django.conf import settings
+
+
+def metrics(request):
+    """Prometheus metrics of this process."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(generate_latest(), content_type=CONTENT_TYPE_LATEST)
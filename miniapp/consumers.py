@@ -1,6 +1,10 @@
 # consumers.py
+import asyncio
 import json
+import uuid
 from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
 from miniapp.models import ChatSession, Message
@@ -11,6 +15,7 @@ from rag_system.tasks import (
     answer_question,
     change_mode_to_chat,
     change_mode_to_skynet,
+    chat_async,
     entry_role,
 )
 from django.contrib.postgres.aggregates import ArrayAgg
@@ -19,6 +24,18 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# in-process answers (RAG_ASYNC_PIPELINE): concurrency cap and strong refs
+# to the running tasks, which the event loop only keeps weakly
+_answer_slots = None
+_running_answers = set()
+
+
+def _get_answer_slots() -> asyncio.Semaphore:
+    global _answer_slots
+    if _answer_slots is None:
+        _answer_slots = asyncio.Semaphore(settings.RAG_ASYNC_MAX_CONCURRENCY)
+    return _answer_slots
+
 
 class NotificationsConsumer(AsyncJsonWebsocketConsumer):
     # Channels 4.x allows async encode_json
@@ -64,8 +81,8 @@ class NotificationsConsumer(AsyncJsonWebsocketConsumer):
         Adjust prefetch/related_name to your models.
         """
         qs = ChatSession.objects.select_related("bot_client").prefetch_related(
-            "messages"
-        )  # or "messages" if that's your related_name
+            Prefetch("messages", queryset=Message.objects.filter(is_summary=False))
+        )
         session = qs.filter(pk=session_id).first()
         if session:
             data = ChatSessionSerializer(session).data
@@ -166,12 +183,52 @@ class NotificationsConsumer(AsyncJsonWebsocketConsumer):
                 prompt, group, self.chat_session_id, content.get("role_id")
             )
         else:
+            stream = bool(content.get("stream", settings.RAG_STREAM_ANSWERS))
+            session = None
+            if settings.RAG_ASYNC_PIPELINE and not _get_answer_slots().locked():
+                session = await ChatSession.objects.filter(
+                    pk=self.chat_session_id, mode=ChatSession.CHAT
+                ).afirst()
+            if session is not None and not _get_answer_slots().locked():
+                # free slot: acquire() returns without suspending
+                await _get_answer_slots().acquire()
+                task_id = str(uuid.uuid4())
+                await self.send_json({"status": "accepted", "task_id": task_id})
+                task = asyncio.create_task(
+                    self._answer_in_process(prompt, session, task_id, stream)
+                )
+                _running_answers.add(task)
+                task.add_done_callback(_running_answers.discard)
+                return
+
             res = answer_question.delay(
-                prompt=prompt, group=group, session_id=self.chat_session_id
+                prompt=prompt,
+                group=group,
+                session_id=self.chat_session_id,
+                stream=stream,
             )
 
         await self.send_json({"status": "accepted", "task_id": res.id})
 
+    async def _answer_in_process(self, prompt, session, task_id, stream):
+        """Chat answer without the Celery round trip; holds one answer slot."""
+        try:
+
+            async def send_delta(delta):
+                await self.send_json(
+                    {"status": "streaming", "task_id": task_id, "delta": delta}
+                )
+
+            response = await chat_async(
+                prompt, session, task_id, send_delta if stream else None
+            )
+            await self.send_json(response)
+        except Exception:
+            # the answer is already saved; the socket may be gone
+            logger.exception("In-process answer %s could not be delivered", task_id)
+        finally:
+            _get_answer_slots().release()
+
     async def notify(self, event):
         await self.send_json(event["data"])
 
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miniapp', '0005_alter_chatsession_options_alter_message_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='is_summary',
+            field=models.BooleanField(default=False, verbose_name='Сводка диалога'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='summary_until',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='miniapp.message', verbose_name='Сводка до сообщения'),
+        ),
+    ]
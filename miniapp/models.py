@@ -42,18 +42,8 @@ class ChatSession(models.Model):
 
     @database_sync_to_async
     def get_history_async(self, message_count: int):
-        # Get the latest message_count message IDs
-        latest_message_ids = self.messages.order_by("-id").values_list("id", flat=True)[
-            :message_count
-        ]
-
-        # Get messages with these IDs in ascending order
-        return list(
-            self.messages.filter(id__in=latest_message_ids)
-            .order_by("id")
-            .annotate(role=F("owner"), content=F("message"))
-            .values("role", "content")
-        )
+        # same history (and roles) as the sync pipeline
+        return self.get_history(message_count)
 
     def get_history(self, message_count: int):
         # First, find the most recent summarize_end message
@@ -61,14 +51,16 @@ class ChatSession(models.Model):
             self.messages.filter(summarize_end=True).order_by("-id").first()
         )
 
+        # rolling summaries are not turns; drop them before taking the window
+        turns = self.messages.filter(is_summary=False)
         if last_summarize_end:
             # If there's a summarize_end, get messages after that point
-            messages_after_summarize = self.messages.filter(
+            messages_after_summarize = turns.filter(
                 id__gt=last_summarize_end.id
             ).order_by("-id")[:message_count]
         else:
             # If no summarize_end, get the latest messages normally
-            messages_after_summarize = self.messages.order_by("-id")[:message_count]
+            messages_after_summarize = turns.order_by("-id")[:message_count]
 
         # Get the IDs of these messages
         message_ids = messages_after_summarize.values_list("id", flat=True)
@@ -120,6 +112,7 @@ class ChatSession(models.Model):
         return (
             self.messages.filter(
                 id__gt=last_summarize_start.id,
+                is_summary=False,
             )
             .order_by("id")
             .annotate(
@@ -138,6 +131,30 @@ class ChatSession(models.Model):
             .values("role", "content")
         )
 
+    def get_skynet_history(self):
+        """
+        Role-play history for the next prompt: (latest rolling summary or
+        None, Message rows after the point it covers, ascending). Without a
+        summary that is the whole role-play since summarize_start.
+        """
+        last_summarize_start = (
+            self.messages.filter(summarize_start=True).order_by("-id").first()
+        )
+        if not last_summarize_start:
+            return None, []
+
+        turns = self.messages.filter(
+            id__gt=last_summarize_start.id, is_summary=False
+        ).order_by("id")
+        summary = (
+            self.messages.filter(id__gt=last_summarize_start.id, is_summary=True)
+            .order_by("-id")
+            .first()
+        )
+        if summary and summary.summary_until_id:
+            turns = turns.filter(id__gt=summary.summary_until_id)
+        return summary, list(turns)
+
 
 class Message(models.Model):
     USER = "user"
@@ -159,6 +176,16 @@ class Message(models.Model):
     summarize_end = models.BooleanField(
         default=False, verbose_name="Конец суммаризации"
     )
+    # rolling summary of a long role-play, see ChatSession.get_skynet_history
+    is_summary = models.BooleanField(default=False, verbose_name="Сводка диалога")
+    summary_until = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Сводка до сообщения",
+    )
     message = models.TextField(verbose_name="Текст сообщения")
     embedding = models.ForeignKey(
         Embedding,
@@ -17,9 +17,14 @@ class MessageSerializer(serializers.ModelSerializer):
 class ChatSessionSerializer(serializers.ModelSerializer):
 
     bot_client = BotClientSerializers(read_only=True)
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
     current_role = RolesSerializer(read_only=True)
 
     class Meta:
         model = ChatSession
         fields = ("id", "bot_client", "messages", "mode", "current_role")
+
+    def get_messages(self, obj):
+        # rolling role-play summaries are prompt material, not chat messages
+        messages = [message for message in obj.messages.all() if not message.is_summary]
+        return MessageSerializer(messages, many=True, context=self.context).data
@@ -1,5 +1,6 @@
 # admin.py
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from unfold.admin import ModelAdmin, TabularInline
 from rag_system.models import Embedding, EmbeddingData
@@ -14,7 +15,7 @@ class EmbeddingDataInline(TabularInline):
 
 @admin.register(Embedding)
 class EmbeddingAdmin(ModelAdmin):
-    list_display = ("short_text", "has_embedding")
+    list_display = ("short_text", "has_embedding", "chunk_count")
     search_fields = ("raw_text",)
 
     # 1) Полностью исключаем оригинальное поле из формы
@@ -70,6 +71,14 @@ class EmbeddingAdmin(ModelAdmin):
     #         obj.embedded_vector = vec
     #     super().save_model(request, obj, form, change)
 
+    def get_queryset(self, request):
+        # chunks are managed through their parent document
+        return super().get_queryset(request).filter(parent__isnull=True)
+
+    @admin.display(description="Фрагментов")
+    def chunk_count(self, obj):
+        return obj.chunks.count()
+
     def save_model(self, request, obj, form, change):
         print(f"🔍 Admin save_model - ID: {obj.id}, Text: {obj.raw_text}")
 
@@ -77,29 +86,24 @@ class EmbeddingAdmin(ModelAdmin):
         super().save_model(request, obj, form, change)
         print(f"✅ Object saved - New ID: {obj.id}")
 
-        if obj.raw_text:
-            print(f"🔄 Starting embedding task for ID: {obj.id}")
-            from .tasks import create_and_save_embedding_task
-
-            try:
-                result = create_and_save_embedding_task.apply_async(
-                    args=[obj.id, obj.raw_text]
-                ).get(timeout=30)
-                print(f"✅ Task completed: {result}")
+    def save_related(self, request, form, formsets, change):
+        # embed after the inlines are saved, so attached files are chunked too
+        super().save_related(request, form, formsets, change)
+        obj = form.instance
 
-                # Refresh and verify
-                obj.refresh_from_db()
-                print(
-                    f"✅ Object refreshed - Has embedding: {obj.embedded_vector is not None}"
-                )
-
-                self.message_user(
-                    request, "Embedding saved successfully!", level="success"
-                )
+        if obj.raw_text or obj.data.exists():
+            from .tasks import create_and_save_embedding_task
 
-            except Exception as e:
-                print(f"❌ Task failed: {e}")
-                self.message_user(request, f"Embedding failed: {str(e)}", level="error")
+            # embed in the worker once the row and its files are committed
+            pk, raw_text = obj.id, obj.raw_text
+            transaction.on_commit(
+                lambda: create_and_save_embedding_task.delay(pk, raw_text)
+            )
+            self.message_user(
+                request,
+                "Embedding queued; the document is searchable once the worker finishes.",
+                level="info",
+            )
 
 
 from .models import Utils
@@ -163,3 +167,29 @@ from .models import Roles
 class RolesAdmin(ModelAdmin):
     list_display = ("name", "behaviour")
     search_fields = ("name", "behaviour")
+
+
+from .models import IngestionJob
+
+
+@admin.register(IngestionJob)
+class IngestionJobAdmin(ModelAdmin):
+    list_display = (
+        "source",
+        "status",
+        "processed_records",
+        "created_embeddings",
+        "updated_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("source", "checksum")
+    readonly_fields = (
+        "source",
+        "checksum",
+        "status",
+        "processed_records",
+        "created_embeddings",
+        "error",
+        "created_at",
+        "updated_at",
+    )
@@ -57,6 +57,9 @@ class RagSystemConfig(AppConfig):
         # ONLY load model if CELERY_WORKER env var is set
         if not _is_celery_worker():
             return
+        # the embedding server holds the only model copy
+        if settings.EMBEDDING_SERVER_URL:
+            return
 
         # Load model only in workers
         try:
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rag_system.utils.answer_cache import get_answer_cache
+
+
+class Command(BaseCommand):
+
+    help = "Show the semantic answer cache hit rate shared by all processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="zero the counters afterwards"
+        )
+
+    def handle(self, *args, **options):
+        cache = get_answer_cache()
+        if cache is None:
+            raise CommandError("RAG_ANSWER_CACHE_ENABLED is off")
+
+        stats = cache.stats()
+        self.stdout.write(
+            f"hits {stats['hits']}, misses {stats['misses']}, "
+            f"hit rate {stats['hit_rate']:.1%}"
+        )
+        if options["reset"]:
+            cache.reset_stats()
+            self.stdout.write("Counters reset")
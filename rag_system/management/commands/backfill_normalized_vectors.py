@@ -0,0 +1,78 @@
+import logging
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rag_system.models import Embedding
+from rag_system.utils.kb_version import mark_embeddings_changed
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = (
+        "L2-normalize existing Embedding vectors in batches and fill the "
+        "embedded_halfvec column, so search can use inner product"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--start-id",
+            type=int,
+            default=0,
+            help="resume after this Embedding id",
+        )
+        parser.add_argument(
+            "--no-halfvec",
+            action="store_true",
+            help="only normalize embedded_vector",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_id = options["start_id"]
+        write_halfvec = not options["no_halfvec"]
+        fields = ["embedded_vector"] + (["embedded_halfvec"] if write_halfvec else [])
+        started = time.monotonic()
+        total = 0
+
+        while True:
+            batch = list(
+                Embedding.objects.exclude(embedded_vector=None)
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "embedded_vector")[:batch_size]
+            )
+            if not batch:
+                break
+
+            matrix = np.vstack(
+                [np.asarray(obj.embedded_vector, dtype=np.float32) for obj in batch]
+            )
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+
+            for obj, vector in zip(batch, matrix):
+                obj.embedded_vector = vector
+                if write_halfvec:
+                    obj.embedded_halfvec = vector
+
+            with transaction.atomic():
+                Embedding.objects.bulk_update(batch, fields)
+            ids = [obj.id for obj in batch]
+            mark_embeddings_changed(ids)
+
+            last_id = ids[-1]
+            total += len(batch)
+            self.stdout.write(f"normalized {total} rows (last id {last_id})")
+
+        elapsed = time.monotonic() - started
+        logger.info("Backfilled %s embeddings in %.1fs", total, elapsed)
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled {total} embeddings in {elapsed:.1f}s")
+        )
@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from rag_system.models import Embedding
+from rag_system.utils.embeddings import normalize_text
+from rag_system.utils.model import get_model_path, load_embedding_model
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILE = "onnx/model.onnx"
+QUANTIZATIONS = ["arm64", "avx2", "avx512", "avx512_vnni"]
+
+# used for the parity check on top of any --sample rows from the database
+PARITY_TEXTS = [
+    "Как оформить заказ на сайте?",
+    "Сколько стоит доставка по Ташкенту?",
+    "Артикул EWA-2031, крем для лица 50 мл",
+    "Состав: гиалуроновая кислота, ниацинамид, пантенол.",
+    "Как стать партнёром компании и получать бонусы?",
+    "What is the return policy for damaged products?",
+    "Маркетинг-план: уровни, проценты и условия квалификации.",
+    "Срок годности 24 месяца, хранить при температуре до 25 °C.",
+]
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Export the embedding model to ONNX (optionally int8-quantized) for "
+        "EMBEDDING_BACKEND=onnx and check its vectors against PyTorch"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--quantize",
+            choices=QUANTIZATIONS,
+            default=None,
+            help="dynamic int8 quantization tuned for this CPU instruction set",
+        )
+        parser.add_argument(
+            "--force", action="store_true", help=f"re-export {ONNX_FILE}"
+        )
+        parser.add_argument(
+            "--check-only",
+            default=None,
+            metavar="ONNX_FILE",
+            help="skip the export and only check this file",
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=0,
+            help="also compare this many knowledge-base texts",
+        )
+        parser.add_argument("--min-cosine", type=float, default=0.99)
+
+    def handle(self, *args, **options):
+        onnx_file = options["check_only"] or self._export(options)
+        self._check_parity(onnx_file, options["sample"], options["min_cosine"])
+
+    def _export(self, options) -> str:
+        model_path = get_model_path()
+        exported = os.path.join(model_path, ONNX_FILE)
+        if options["force"] and os.path.exists(exported):
+            os.remove(exported)
+
+        started = time.monotonic()
+        # sentence-transformers exports on load when the file is missing
+        model = load_embedding_model("onnx", ONNX_FILE)
+        model.save_pretrained(model_path)
+        self.stdout.write(f"{ONNX_FILE} ready in {time.monotonic() - started:.1f}s")
+        if not options["quantize"]:
+            return ONNX_FILE
+
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        export_dynamic_quantized_onnx_model(model, options["quantize"], model_path)
+        quantized = f"onnx/model_qint8_{options['quantize']}.onnx"
+        self.stdout.write(f"{quantized} written")
+        return quantized
+
+    def _check_parity(self, onnx_file: str, sample: int, min_cosine: float):
+        texts = list(PARITY_TEXTS)
+        if sample:
+            texts += list(
+                Embedding.objects.order_by("-id").values_list("raw_text", flat=True)[
+                    :sample
+                ]
+            )
+        texts = [normalize_text(text) for text in texts]
+
+        reference = load_embedding_model("torch")
+        candidate = load_embedding_model("onnx", onnx_file)
+        timings = {}
+        vectors = {}
+        for name, model in (("torch", reference), ("onnx", candidate)):
+            model.encode(texts[:2])  # warm-up
+            started = time.monotonic()
+            vectors[name] = model.encode(texts, normalize_embeddings=True)
+            timings[name] = (time.monotonic() - started) * 1000 / len(texts)
+
+        cosine = np.sum(vectors["torch"] * vectors["onnx"], axis=1)
+        summary = (
+            f"{onnx_file}: cosine vs torch min {cosine.min():.4f}, "
+            f"mean {cosine.mean():.4f} over {len(texts)} texts; "
+            f"{timings['torch']:.1f} ms/text torch, {timings['onnx']:.1f} ms/text onnx"
+        )
+        logger.info(summary)
+        if cosine.min() < min_cosine:
+            raise CommandError(f"Parity check failed (< {min_cosine}). {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
+        self.stdout.write(
+            f"Use it with EMBEDDING_BACKEND=onnx EMBEDDING_ONNX_FILE={onnx_file}"
+        )
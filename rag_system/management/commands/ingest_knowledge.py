@@ -0,0 +1,77 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rag_system.models import IngestionJob
+from rag_system.utils.ingestion import FORMATS, WRITERS, ingest_file
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Ingest JSONL/CSV/Markdown files into the knowledge base: chunk, encode in "
+        "large batches and bulk-write Embedding rows. Rerunning resumes unfinished files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+")
+        parser.add_argument(
+            "--format", dest="fmt", choices=sorted(set(FORMATS.values())), default=None
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None, help="chunks encoded per batch"
+        )
+        parser.add_argument("--method", choices=list(WRITERS), default="bulk")
+        parser.add_argument(
+            "--text-field",
+            default=None,
+            help="JSONL/CSV field with the text (default: raw_text, text or content)",
+        )
+        parser.add_argument(
+            "--async",
+            dest="run_async",
+            action="store_true",
+            help="queue a Celery task per file instead of running here",
+        )
+
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            if options["run_async"]:
+                from rag_system.tasks import ingest_knowledge_task
+
+                # the worker resolves the path from its own working directory
+                result = ingest_knowledge_task.delay(
+                    os.path.abspath(path),
+                    fmt=options["fmt"],
+                    batch_size=options["batch_size"],
+                    method=options["method"],
+                    text_field=options["text_field"],
+                )
+                self.stdout.write(f"{path}: queued task {result.id}")
+                continue
+
+            try:
+                job = ingest_file(
+                    path,
+                    fmt=options["fmt"],
+                    batch_size=options["batch_size"],
+                    method=options["method"],
+                    text_field=options["text_field"],
+                    progress=self._progress,
+                )
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"{path}: {exc}") from exc
+
+            if job.status == IngestionJob.DONE:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{path}: {job.processed_records} records, "
+                        f"{job.created_embeddings} embeddings"
+                    )
+                )
+
+    def _progress(self, job, rate):
+        self.stdout.write(
+            f"  {job.processed_records} records, {job.created_embeddings} embeddings, "
+            f"{rate:.1f} docs/sec"
+        )
@@ -0,0 +1,115 @@
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from rag_system.models import Embedding
+
+logger = logging.getLogger(__name__)
+
+# column -> (index name, operator class prefix)
+INDEXES = {
+    "embedded_vector": ("embedding_vector_idx", "vector"),
+    "embedded_halfvec": ("embedding_halfvec_idx", "halfvec"),
+}
+OPS_SUFFIX = {"cosine": "cosine_ops", "inner_product": "ip_ops"}
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Rebuild the ANN index on an Embedding vector column (HNSW or IVFFlat) "
+        "with CREATE INDEX CONCURRENTLY, swapping it in without blocking writes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--column", choices=list(INDEXES), default="embedded_vector"
+        )
+        parser.add_argument(
+            "--distance",
+            choices=list(OPS_SUFFIX),
+            default=None,
+            help="operator class; defaults to cosine for embedded_vector, "
+            "inner_product for embedded_halfvec",
+        )
+        parser.add_argument(
+            "--kind",
+            choices=["hnsw", "ivfflat"],
+            default=settings.VECTOR_INDEX_KIND,
+        )
+        parser.add_argument("--m", type=int, default=16, help="HNSW: links per node")
+        parser.add_argument(
+            "--ef-construction",
+            type=int,
+            default=64,
+            help="HNSW: candidate list size while building",
+        )
+        parser.add_argument(
+            "--lists",
+            type=int,
+            default=None,
+            help="IVFFlat: number of lists (default rows/1000, sqrt(rows) above 1M)",
+        )
+        parser.add_argument(
+            "--maintenance-work-mem",
+            default=None,
+            help="e.g. 512MB; the build is much faster when the graph fits in memory",
+        )
+
+    def handle(self, *args, **options):
+        table = Embedding._meta.db_table
+        field = options["column"]
+        column = Embedding._meta.get_field(field).column
+        index_name, ops_prefix = INDEXES[field]
+        distance = options["distance"] or (
+            "inner_product" if field == "embedded_halfvec" else "cosine"
+        )
+        opclass = f"{ops_prefix}_{OPS_SUFFIX[distance]}"
+        tmp_name = f"{index_name}_new"
+
+        if options["kind"] == "hnsw":
+            using = (
+                f"hnsw ({column} {opclass}) "
+                f"WITH (m = {options['m']}, ef_construction = {options['ef_construction']})"
+            )
+        else:
+            lists = options["lists"] or self._default_lists(field)
+            using = f"ivfflat ({column} {opclass}) WITH (lists = {lists})"
+
+        started = time.monotonic()
+        with connection.cursor() as cursor:
+            if options["maintenance_work_mem"]:
+                cursor.execute(
+                    "SELECT set_config('maintenance_work_mem', %s, false)",
+                    [options["maintenance_work_mem"]],
+                )
+            # leftovers of an interrupted run are INVALID indexes
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {tmp_name}")
+            try:
+                cursor.execute(
+                    f"CREATE INDEX CONCURRENTLY {tmp_name} ON {table} USING {using}"
+                )
+            except Exception as exc:
+                raise CommandError(f"Index build failed: {exc}") from exc
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+            cursor.execute(f"ALTER INDEX {tmp_name} RENAME TO {index_name}")
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Rebuilt %s as %s (%s) in %.1fs", index_name, options["kind"], opclass, elapsed
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{index_name} rebuilt as {options['kind']} ({opclass}) in {elapsed:.1f}s"
+            )
+        )
+
+    def _default_lists(self, field: str) -> int:
+        rows = Embedding.objects.exclude(**{field: None}).count()
+        if rows > 1_000_000:
+            return int(math.sqrt(rows))
+        return max(1, rows // 1000)
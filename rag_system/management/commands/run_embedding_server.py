@@ -0,0 +1,138 @@
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rag_system.utils.batcher import EmbeddingBatcher
+from rag_system.utils.embeddings import encode_batch
+from rag_system.utils.model import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+BINARY = "application/octet-stream"
+
+
+class EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /embed {"texts": [...]} -> vectors, as JSON {"embeddings": [...]}
+    or, with Accept: application/octet-stream, float32 rows.
+    GET /health -> model name and version.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive for pooled clients
+    batcher: EmbeddingBatcher = None
+    max_texts = 1024
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._send_json(404, {"error": "not found"})
+        self._send_json(
+            200,
+            {
+                "status": "ok",
+                "model": settings.EMBEDDING_MODEL_NAME,
+                "version": settings.EMBEDDING_MODEL_VERSION,
+            },
+        )
+
+    def do_POST(self):
+        if self.path != "/embed":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("texts must be a list of strings")
+            if len(texts) > self.max_texts:
+                raise ValueError(f"at most {self.max_texts} texts per request")
+        except (ValueError, KeyError, TypeError) as exc:
+            return self._send_json(400, {"error": str(exc)})
+
+        started = time.monotonic()
+        try:
+            # texts of concurrent requests share forward passes
+            futures = [self.batcher.submit(text) for text in texts]
+            vectors = [future.result() for future in futures]
+        except Exception as exc:
+            logger.exception("Encoding failed")
+            return self._send_json(500, {"error": str(exc)})
+        logger.debug(
+            "Embedded %s texts in %.1f ms",
+            len(texts),
+            (time.monotonic() - started) * 1000,
+        )
+
+        if BINARY in (self.headers.get("Accept") or ""):
+            body = np.asarray(vectors, dtype="<f4").tobytes()
+            return self._send(200, body, BINARY)
+        self._send_json(200, {"embeddings": vectors})
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode(), "application/json")
+
+    def _send(self, status, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Serve the embedding model over HTTP (POST /embed) so every process "
+        "shares one model copy; requests are batched across clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8500)
+        parser.add_argument(
+            "--max-batch-size", type=int, default=settings.EMBEDDING_BATCH_MAX_SIZE
+        )
+        parser.add_argument(
+            "--max-wait-ms",
+            type=float,
+            default=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            help="how long to hold a batch open for more texts",
+        )
+
+    def handle(self, *args, **options):
+        if settings.EMBEDDING_SERVER_URL:
+            # this process must encode locally, not call itself
+            settings.EMBEDDING_SERVER_URL = ""
+
+        started = time.monotonic()
+        get_embedding_model()
+        self.stdout.write(
+            f"{settings.EMBEDDING_MODEL_NAME} loaded in {time.monotonic() - started:.1f}s"
+        )
+
+        EmbeddingRequestHandler.batcher = EmbeddingBatcher(
+            encode_batch,
+            max_batch_size=options["max_batch_size"],
+            max_wait_ms=options["max_wait_ms"],
+        )
+        server = ThreadingHTTPServer(
+            (options["host"], options["port"]), EmbeddingRequestHandler
+        )
+        server.daemon_threads = True
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Embedding server on http://{options['host']}:{options['port']}"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:01
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('rag_system', '0009_roles_portret_alter_roles_summarize_behaviour'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='embedding',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedded_vector'], m=16, name='embedding_vector_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
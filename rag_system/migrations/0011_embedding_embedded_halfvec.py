@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:06
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('rag_system', '0010_embedding_vector_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedding',
+            name='embedded_halfvec',
+            field=pgvector.django.halfvec.HalfVectorField(blank=True, dimensions=768, null=True, verbose_name='Векторный эмбеддинг (halfvec)'),
+        ),
+        AddIndexConcurrently(
+            model_name='embedding',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedded_halfvec'], m=16, name='embedding_halfvec_idx', opclasses=['halfvec_ip_ops']),
+        ),
+    ]
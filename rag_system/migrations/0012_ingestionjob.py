@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag_system', '0011_embedding_embedded_halfvec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=500, verbose_name='Источник')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает'), ('running', 'Выполняется'), ('done', 'Завершено'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('processed_records', models.PositiveIntegerField(default=0, verbose_name='Обработано записей')),
+                ('created_embeddings', models.PositiveIntegerField(default=0, verbose_name='Создано эмбеддингов')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Загрузка базы знаний',
+                'verbose_name_plural': 'Загрузки базы знаний',
+                'constraints': [models.UniqueConstraint(fields=('source', 'checksum'), name='ingestionjob_source_checksum')],
+            },
+        ),
+    ]
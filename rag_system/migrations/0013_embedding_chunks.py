@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag_system', '0012_ingestionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedding',
+            name='chunk_index',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Номер фрагмента'),
+        ),
+        migrations.AddField(
+            model_name='embedding',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='rag_system.embedding', verbose_name='Родительский документ'),
+        ),
+        migrations.AddField(
+            model_name='embedding',
+            name='source_file',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='rag_system.embeddingdata', verbose_name='Файл-источник'),
+        ),
+    ]
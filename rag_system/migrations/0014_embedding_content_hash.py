@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rag_system', '0013_embedding_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedding',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Хэш содержимого'),
+        ),
+        migrations.AddField(
+            model_name='embedding',
+            name='embedding_model',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, verbose_name='Версия модели'),
+        ),
+    ]
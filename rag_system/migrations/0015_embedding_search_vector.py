@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-17 18:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('rag_system', '0014_embedding_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedding',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('raw_text', config='russian'), output_field=django.contrib.postgres.search.SearchVectorField(), verbose_name='Полнотекстовый индекс'),
+        ),
+        AddIndexConcurrently(
+            model_name='embedding',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='embedding_search_vector_idx'),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
-from pgvector.django import VectorField
+from pgvector.django import HalfVectorField, HnswIndex, VectorField
 
 
 class Embedding(models.Model):
@@ -10,14 +12,88 @@ class Embedding(models.Model):
         blank=True,
         verbose_name="Векторный эмбеддинг",
     )
+    # L2-normalized float16 copy: half the storage and I/O, searched by inner product
+    embedded_halfvec = HalfVectorField(
+        dimensions=768,
+        null=True,
+        blank=True,
+        verbose_name="Векторный эмбеддинг (halfvec)",
+    )
+    # chunks of a long text or of an attached file point back to their document
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="chunks",
+        verbose_name="Родительский документ",
+    )
+    source_file = models.ForeignKey(
+        "EmbeddingData",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="chunks",
+        verbose_name="Файл-источник",
+    )
+    chunk_index = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Номер фрагмента"
+    )
+    # what the stored vectors were computed from; a mismatch with raw_text or
+    # EMBEDDING_MODEL_VERSION marks the row for re-embedding
+    content_hash = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Хэш содержимого",
+    )
+    embedding_model = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Версия модели",
+    )
+    # full-text side of hybrid search; computed by Postgres, so every writer
+    # (bulk_create and COPY included) keeps it in sync
+    search_vector = models.GeneratedField(
+        expression=SearchVector("raw_text", config="russian"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name="Полнотекстовый индекс",
+    )
 
     class Meta:
         verbose_name = "Эмбеддинг"
         verbose_name_plural = "Эмбеддинг"
+        indexes = [
+            # ANN index for CosineDistance ordering; rebuild_vector_index can
+            # recreate it (also as IVFFlat) without blocking writes
+            HnswIndex(
+                name="embedding_vector_idx",
+                fields=["embedded_vector"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+            HnswIndex(
+                name="embedding_halfvec_idx",
+                fields=["embedded_halfvec"],
+                m=16,
+                ef_construction=64,
+                opclasses=["halfvec_ip_ops"],
+            ),
+            GinIndex(name="embedding_search_vector_idx", fields=["search_vector"]),
+        ]
 
     def __str__(self):
         return self.raw_text[:50]  # показываем первые 50 символов текста
 
+    @property
+    def root_id(self):
+        return self.parent_id or self.id
+
 
 class EmbeddingData(models.Model):
     embedding = models.ForeignKey(
@@ -41,6 +117,47 @@ class EmbeddingData(models.Model):
         return f"Файл для {self.embedding}"
 
 
+class IngestionJob(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Ожидает"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Завершено"),
+        (FAILED, "Ошибка"),
+    )
+
+    source = models.CharField(max_length=500, verbose_name="Источник")
+    checksum = models.CharField(max_length=64, verbose_name="SHA-256 файла")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Статус"
+    )
+    # records of the source already written; a restart resumes after them
+    processed_records = models.PositiveIntegerField(
+        default=0, verbose_name="Обработано записей"
+    )
+    created_embeddings = models.PositiveIntegerField(
+        default=0, verbose_name="Создано эмбеддингов"
+    )
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    class Meta:
+        verbose_name = "Загрузка базы знаний"
+        verbose_name_plural = "Загрузки базы знаний"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "checksum"], name="ingestionjob_source_checksum"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.get_status_display()})"
+
+
 class Utils(models.Model):
     base_rules = models.TextField(verbose_name="Основные правила")
     base_information = models.TextField(verbose_name="Базовая информация")
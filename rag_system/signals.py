@@ -15,3 +15,28 @@ from rag_system.models import Embedding
 #     if created and not instance.embedded_vector and instance.raw_text:
 #         # Use Celery task instead of direct embedding call
 #         save_embedding_with_vector_task.delay(instance.id, instance.raw_text)
+
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from rag_system.utils.kb_version import mark_embeddings_changed
+
+
+@receiver(post_save, sender=Embedding)
+@receiver(post_delete, sender=Embedding)
+def embedding_changed(sender, instance, **kwargs):
+    # publish after commit so other processes re-read the committed row
+    pk = instance.pk
+    transaction.on_commit(lambda: mark_embeddings_changed([pk]))
+
+
+from rag_system.models import Roles, Utils
+from rag_system.utils.config_version import bump_config_version
+
+
+@receiver(post_save, sender=Utils)
+@receiver(post_delete, sender=Utils)
+@receiver(post_save, sender=Roles)
+@receiver(post_delete, sender=Roles)
+def config_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_config_version)
@@ -1,10 +1,15 @@
 import json
+import time
 
 from celery import shared_task
+from django.conf import settings
 from rag_system.utils import (
+    get_answer_async,
+    get_answer_stream,
     get_answer_sync,
     skynet_summarize,
     get_answer__skynet_sync,
+    get_roles,
     skynet_introduce,
 )
 
@@ -28,17 +33,51 @@ def _fetch_embedding_serialized(embedding_id: int):
     obj = Embedding.objects.prefetch_related("data").filter(id=embedding_id).first()
     if not obj:
         return None
+    # a chunk answers for its whole document (and the document's files)
+    if obj.parent_id:
+        obj = Embedding.objects.prefetch_related("data").get(id=obj.parent_id)
     # If you need absolute file URLs, pass {"request": request} from a DRF view.
     return EmbeddingSerializer(obj, context={}).data
 
 
+class _DeltaSender:
+    """Forward answer deltas to the group, at most one event per flush interval."""
+
+    def __init__(self, group, task_id):
+        self.group = group
+        self.task_id = task_id
+        self.interval = settings.RAG_STREAM_FLUSH_MS / 1000
+        self.buffer = []
+        self.last_sent = 0.0
+        self.group_send = async_to_sync(get_channel_layer().group_send)
+
+    def __call__(self, delta):
+        self.buffer.append(delta)
+        # the first delta goes out at once: it is the perceived latency
+        if time.monotonic() - self.last_sent >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        delta, self.buffer = "".join(self.buffer), []
+        self.group_send(
+            self.group,
+            {
+                "type": "notify",
+                "data": {"status": "streaming", "task_id": self.task_id, "delta": delta},
+            },
+        )
+        self.last_sent = time.monotonic()
+
+
 @shared_task(bind=True)
-def answer_question(self, prompt, group, session_id):
+def answer_question(self, prompt, group, session_id, stream=False):
     try:
         session = ChatSession.objects.get(pk=session_id)
 
         if session.mode == ChatSession.CHAT:
-            response = chat(prompt, group, session, self.request.id)
+            response = chat(prompt, group, session, self.request.id, stream=stream)
         elif session.mode == ChatSession.SKYNET:
             response = skynet_chat(prompt, group, session, self.request.id)
 
@@ -64,45 +103,72 @@ def answer_question(self, prompt, group, session_id):
         raise
 
 
-def chat(prompt, group, session, taskId):
+def _chat_response(result, session, taskId):
+    """Save the answer message and build the final notify payload"""
+    # normalize result -> dict
+    if isinstance(result, str):
+        try:
+            payload = json.loads(result)
+        except json.JSONDecodeError:
+            payload = {"answer": result}
+    else:
+        payload = result or {}
+
+    answer_text = payload.get("answer") or ""
+
+    embedding_id = payload.get("id")
+    embedding_data = (
+        _fetch_embedding_serialized(embedding_id)
+        if embedding_id is not None
+        else None
+    )
+    if embedding_id == -1:
+        embedding_id = None
+    elif embedding_data:
+        embedding_id = embedding_data["id"]
+
+    ai_msg = Message.objects.create(
+        session=session,
+        owner="system",
+        message=answer_text,
+        embedding_id=embedding_id,
+    )
+    response = {
+        "id": embedding_id,
+        "answer": payload.get("answer"),
+        "embedding": embedding_data,
+        "task_id": taskId,
+    }
+    return response
+
+
+def chat(prompt, group, session, taskId, stream=False):
     try:
 
-        result = get_answer_sync(prompt, session)
-
-        channel_layer = get_channel_layer()
-        # normalize result -> dict
-        if isinstance(result, str):
-            try:
-                payload = json.loads(result)
-            except json.JSONDecodeError:
-                payload = {"answer": result}
+        if stream:
+            sender = _DeltaSender(group, taskId)
+            result = get_answer_stream(prompt, session, sender)
+            sender.flush()
         else:
-            payload = result or {}
-
-        answer_text = payload.get("answer") or ""
-
-        embedding_id = payload.get("id")
-        embedding_data = (
-            _fetch_embedding_serialized(embedding_id)
-            if embedding_id is not None
-            else None
-        )
-        if embedding_id == -1:
-            embedding_id = None
+            result = get_answer_sync(prompt, session)
 
-        ai_msg = Message.objects.create(
-            session=session,
-            owner="system",
-            message=answer_text,
-            embedding_id=embedding_id,
-        )
-        response = {
-            "id": embedding_id,
-            "answer": payload.get("answer"),
-            "embedding": embedding_data,
+        return _chat_response(result, session, taskId)
+    except Exception as e:
+        return {
+            "status": "failure",
             "task_id": taskId,
+            "error": str(e),
         }
-        return response
+
+
+async def chat_async(prompt, session, taskId, on_delta=None):
+    """
+    chat() for the in-process pipeline: AsyncOpenAI instead of a Celery
+    worker; only the DB writes run in the thread pool.
+    """
+    try:
+        result = await get_answer_async(prompt, session, on_delta)
+        return await sync_to_async(_chat_response)(result, session, taskId)
     except Exception as e:
         return {
             "status": "failure",
@@ -122,6 +188,7 @@ def skynet_chat(prompt, group, session, taskId):
             owner="system",
             message=answer_text,
         )
+        _schedule_skynet_summary(session)
         response = {
             "id": None,
             "answer": answer_text,
@@ -159,7 +226,7 @@ def change_mode_to_skynet(self, prompt, group, session_id):
         )
 
         roles = [
-            {"role_name": role.name, "role_id": role.id} for role in Roles.objects.all()
+            {"role_name": role.name, "role_id": role.id} for role in get_roles()
         ]
         response = {
             "id": None,
@@ -289,7 +356,7 @@ def entry_role(self, prompt, group, session_id, role_id):
 
 
 # Add to your tasks.py
-@shared_task
+@shared_task(ignore_result=False)
 def create_embedding_task(raw_text):
     """Create embedding in worker and return the vector"""
     from rag_system.utils.embeddings import get_embedding
@@ -303,13 +370,19 @@ def save_embedding_with_vector_task(embedding_id, raw_text):
     """Create embedding and save it to the model instance"""
     from rag_system.models import Embedding
     from rag_system.utils import get_embedding
+    from rag_system.utils.embeddings import content_tag_values, embedding_field_values
 
     embedding_vector = get_embedding(raw_text)
 
     # Save to database - mark to avoid signal loop
     embedding_obj = Embedding.objects.get(id=embedding_id)
     embedding_obj._embedding_processing = True  # Prevent signal loop
-    embedding_obj.embedded_vector = embedding_vector
+    values = {
+        **embedding_field_values(embedding_vector),
+        **content_tag_values(raw_text),
+    }
+    for field, value in values.items():
+        setattr(embedding_obj, field, value)
     embedding_obj.save()
 
     return embedding_id
@@ -317,23 +390,126 @@ def save_embedding_with_vector_task(embedding_id, raw_text):
 
 # tasks.py
 @shared_task
-def create_and_save_embedding_task(embedding_id, raw_text):
-    """Create embedding and save it directly to the database"""
-    from rag_system.models import Embedding
-    from rag_system.utils.embeddings import get_embedding
+def create_and_save_embedding_task(embedding_id, raw_text=None):
+    """Embed a document (or its chunks and attached files) and save the vectors"""
+    from rag_system.utils.documents import embed_document
 
     try:
-        # Generate the embedding
-        embedding_vector = get_embedding(raw_text)
+        written = embed_document(embedding_id)
 
-        # Save directly to database
-        updated = Embedding.objects.filter(id=embedding_id).update(
-            embedded_vector=embedding_vector
-        )
-
-        print(f"✅ Embedding saved for ID {embedding_id}, rows updated: {updated}")
+        print(f"✅ Embedding saved for ID {embedding_id}, vectors written: {written}")
         return f"Embedding saved for ID {embedding_id}"
 
     except Exception as e:
         print(f"❌ Failed to save embedding for ID {embedding_id}: {e}")
         raise
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    time_limit=settings.RAG_INGEST_TIME_LIMIT,
+    soft_time_limit=settings.RAG_INGEST_TIME_LIMIT - 60,
+)
+def ingest_knowledge_task(
+    self, path, fmt=None, batch_size=None, method="bulk", text_field=None
+):
+    """Bulk-ingest a JSONL/CSV/Markdown file; a redelivered task resumes the job"""
+    from rag_system.utils.ingestion import ingest_file
+
+    job = ingest_file(
+        path, fmt=fmt, batch_size=batch_size, method=method, text_field=text_field
+    )
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "processed_records": job.processed_records,
+        "created_embeddings": job.created_embeddings,
+    }
+
+
+def _schedule_skynet_summary(session):
+    """Compress the role-play in the background once it outgrows the trigger."""
+    from rag_system.utils.skynet import skynet_history_tokens
+
+    try:
+        _, turns = session.get_skynet_history()
+        if skynet_history_tokens(turns) > settings.SKYNET_SUMMARY_TRIGGER_TOKENS:
+            summarize_skynet_history_task.delay(session.id)
+    except Exception:
+        # the answer is already saved; the next turn retries
+        logger.exception("Could not schedule the role-play summary")
+
+
+SKYNET_SUMMARY_LOCK_KEY = "rag:skynet:summary:{}"
+
+
+@shared_task(bind=True, acks_late=True)
+def summarize_skynet_history_task(self, session_id):
+    """Fold older role-play turns of a session into a rolling summary message"""
+    import redis
+
+    from rag_system.utils.redis_client import get_redis
+    from rag_system.utils.skynet import skynet_compress_history
+
+    # turns arriving while a summary is being written must not start another
+    lock = get_redis().lock(SKYNET_SUMMARY_LOCK_KEY.format(session_id), timeout=300)
+    try:
+        if not lock.acquire(blocking=False):
+            return {"status": "skipped"}
+    except redis.RedisError:
+        logger.warning("Summary lock unavailable, running unlocked")
+        lock = None
+
+    try:
+        session = ChatSession.objects.filter(pk=session_id).first()
+        if session is None or session.mode != ChatSession.SKYNET:
+            return {"status": "skipped"}
+        summary = skynet_compress_history(session)
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except redis.RedisError:
+                pass
+    return {"status": "done", "summary_id": summary.id if summary else None}
+
+
+REEMBED_LOCK_KEY = "rag:reembed:lock"
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    time_limit=settings.RAG_REEMBED_TIME_LIMIT,
+    soft_time_limit=settings.RAG_REEMBED_TIME_LIMIT - 60,
+)
+def reembed_stale_task(self, batch_size=None):
+    """Re-embed rows whose text or model version changed; scheduled by celery beat"""
+    import time
+
+    import redis
+
+    from rag_system.utils.redis_client import get_redis
+    from rag_system.utils.reembedding import reembed_stale
+
+    # one run at a time: a model swap can outlast the beat interval
+    lock = get_redis().lock(REEMBED_LOCK_KEY, timeout=settings.RAG_REEMBED_TIME_LIMIT)
+    try:
+        if not lock.acquire(blocking=False):
+            return {"status": "skipped"}
+    except redis.RedisError:
+        logger.warning("Re-embed lock unavailable, running unlocked")
+        lock = None
+
+    try:
+        # leave the soft limit for the last batch to finish
+        deadline = time.monotonic() + settings.RAG_REEMBED_TIME_LIMIT - 300
+        written = reembed_stale(batch_size=batch_size, deadline=deadline)
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except redis.RedisError:
+                pass
+    return {"status": "done", "vectors": written}
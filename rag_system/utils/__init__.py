@@ -1,5 +1,16 @@
-from rag_system.utils.get_answer import get_answer_async, get_answer_sync
+from rag_system.utils.get_answer import (
+    get_answer_async,
+    get_answer_stream,
+    get_answer_sync,
+)
 from rag_system.utils.model import get_embedding_model
-from rag_system.utils.gpt_rules import get_utils, get_utils_async
+from rag_system.utils.embeddings import (
+    get_embedding,
+    get_embedding_async,
+    get_embeddings,
+    get_query_embedding,
+    get_query_embedding_async,
+)
+from rag_system.utils.gpt_rules import get_roles, get_utils, get_utils_async
 from rag_system.utils.get_skynet_answer import get_answer__skynet_sync
 from rag_system.utils.skynet import skynet_summarize, skynet_introduce
@@ -0,0 +1,175 @@
+# rag_system/utils/answer_cache.py
+"""
+Semantic answer cache: a question whose embedding is within
+RAG_ANSWER_CACHE_THRESHOLD cosine of an already answered one reuses that
+answer instead of a search + LLM round trip.
+
+Entries live in Redis under a scope made of the knowledge-base version, the
+config version (Utils/Roles) and the embedding model version. Any change to
+Embedding, Utils or Roles moves every process to a new, empty scope; old
+scopes simply expire. Each process mirrors the current scope as a NumPy
+matrix and only fetches entries appended since its last lookup.
+"""
+import json
+import logging
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import redis
+from django.conf import settings
+
+from .config_version import CONFIG_VERSION_KEY
+from .kb_version import KB_VERSION_KEY
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+
+    prefix = "rag:answers"
+    stats_key = "rag:answers:stats"
+
+    def __init__(self, threshold: float = 0.985, max_entries: int = 5000, ttl: int = 86400):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._scope = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._payloads = []
+
+    def _keys(self, scope: str) -> Tuple[str, str]:
+        return f"{self.prefix}:{scope}:vectors", f"{self.prefix}:{scope}:payloads"
+
+    def current_scope(self) -> str:
+        kb_version, config_version = get_redis().mget(KB_VERSION_KEY, CONFIG_VERSION_KEY)
+        return (
+            f"{int(kb_version or 0)}:{int(config_version or 0)}:"
+            f"{settings.EMBEDDING_MODEL_VERSION}"
+        )
+
+    def _sync(self, client: redis.Redis, scope: str):
+        """Pull entries appended to ``scope`` since the last lookup."""
+        vectors_key, payloads_key = self._keys(scope)
+        with self._lock:
+            if scope != self._scope:
+                self._scope = scope
+                self._matrix = np.empty((0, 0), dtype=np.float32)
+                self._payloads = []
+            start = len(self._payloads)
+        with client.pipeline(transaction=True) as pipe:
+            pipe.lrange(vectors_key, start, -1)
+            pipe.lrange(payloads_key, start, -1)
+            vectors, payloads = pipe.execute()
+        count = min(len(vectors), len(payloads))
+        if not count:
+            return
+        rows = np.vstack(
+            [np.frombuffer(raw, dtype=np.float32) for raw in vectors[:count]]
+        )
+        with self._lock:
+            # another thread may have synced meanwhile
+            if self._scope != scope or len(self._payloads) != start:
+                return
+            self._matrix = rows if not start else np.vstack([self._matrix, rows])
+            self._payloads.extend(json.loads(raw) for raw in payloads[:count])
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        q = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def lookup(self, vector) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Return (cached payload or None, scope). Pass the scope to store(), so
+        an answer computed while the knowledge base changed lands in the old,
+        already dead scope instead of serving stale content.
+        """
+        try:
+            client = get_redis()
+            scope = self.current_scope()
+            self._sync(client, scope)
+        except redis.RedisError as exc:
+            logger.warning("Answer cache unavailable: %s", exc)
+            return None, None
+
+        with self._lock:
+            matrix, payloads = self._matrix, self._payloads
+        payload = None
+        if len(payloads):
+            scores = matrix @ self._unit(vector)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                payload = payloads[best]
+        self._count("hits" if payload is not None else "misses")
+        return payload, scope
+
+    def store(self, scope: Optional[str], vector, payload: dict):
+        if scope is None:
+            return
+        vectors_key, payloads_key = self._keys(scope)
+        try:
+            client = get_redis()
+            if client.llen(payloads_key) >= self.max_entries:
+                return
+            with client.pipeline(transaction=True) as pipe:
+                pipe.rpush(vectors_key, self._unit(vector).tobytes())
+                pipe.rpush(payloads_key, json.dumps(payload, ensure_ascii=False))
+                pipe.expire(vectors_key, self.ttl)
+                pipe.expire(payloads_key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Answer cache unavailable: %s", exc)
+
+    def _count(self, field: str):
+        try:
+            get_redis().hincrby(self.stats_key, field, 1)
+        except redis.RedisError:
+            pass
+
+    def stats(self) -> dict:
+        """Hit/miss counters shared by all processes."""
+        raw = get_redis().hgetall(self.stats_key)
+        hits = int(raw.get(b"hits", 0))
+        misses = int(raw.get(b"misses", 0))
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        get_redis().delete(self.stats_key)
+
+
+_cache = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """The process-wide cache, or None when RAG_ANSWER_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.RAG_ANSWER_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = SemanticAnswerCache(
+            threshold=settings.RAG_ANSWER_CACHE_THRESHOLD,
+            max_entries=settings.RAG_ANSWER_CACHE_MAX_ENTRIES,
+            ttl=settings.RAG_ANSWER_CACHE_TTL,
+        )
+    return _cache
+
+
+def answer_payload(result) -> Optional[dict]:
+    """The cacheable {id, answer} of an LLM result, or None."""
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(result, dict) or not result.get("answer"):
+        return None
+    return {"id": result.get("id"), "answer": result["answer"]}
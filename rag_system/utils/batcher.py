@@ -0,0 +1,116 @@
+# rag_system/utils/batcher.py
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Sequence
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts submitted by concurrent callers (threads, async tasks) for a
+    few milliseconds and encodes them as one batch, then resolves every
+    caller's future with its own vector.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], Sequence[List[float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+    ):
+        self._encode = encode
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._worker = None
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def _ensure_worker(self):
+        if (
+            self._pid == os.getpid()
+            and self._worker is not None
+            and self._worker.is_alive()
+        ):
+            return
+        with self._lock:
+            # threads do not survive fork (celery prefork), start a fresh one
+            if self._pid != os.getpid():
+                self._reset()
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="embedding-batcher", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        batch = [(text, f) for text, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        # identical texts in one window are encoded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = self._encode(unique_texts)
+        except Exception as exc:
+            logger.exception("Embedding batch of %s failed", len(unique_texts))
+            for _, f in batch:
+                f.set_exception(exc)
+            return
+
+        by_text = dict(zip(unique_texts, vectors))
+        for text, f in batch:
+            f.set_result(by_text[text])
+        logger.debug(
+            "Encoded batch: %s requests, %s unique texts", len(batch), len(unique_texts)
+        )
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from .embeddings import encode_batch
+
+                _batcher = EmbeddingBatcher(
+                    encode_batch,
+                    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+                )
+    return _batcher
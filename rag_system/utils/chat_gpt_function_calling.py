@@ -1,10 +1,14 @@
 from django.conf import settings
+import asyncio
 import json
 from openai import AsyncOpenAI, OpenAI
 from rag_system.models import Embedding
+from .db import release_db_connection
 from .gpt_rules import get_utils, get_utils_async
+from .prompt import chat_input, prompt_cache_key, record_usage
+from .streaming import AnswerDeltaExtractor
 
-from typing import Optional, Dict
+from typing import Awaitable, Callable, Optional, Dict
 from rag_system.models import Utils
 from miniapp.models import ChatSession
 
@@ -37,39 +41,55 @@ tools = [
 
 
 async def get_answer_gpt_function_async(
-    user_prompt: str, contents: Embedding, session_object: ChatSession
-) -> Optional[Dict]:
+    user_prompt: str,
+    contents: Embedding,
+    session_object: ChatSession,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Optional[str]:
+    """
+    AsyncOpenAI version of get_answer_gpt_function for the in-process
+    pipeline; with on_delta the answer is streamed as in the sync variant.
+    """
     utils: Utils = await get_utils_async()
     inputs = await session_object.get_history_async(utils.last_message_count)
-    response = await client_async.responses.create(
+    # Fitting the prompt to the token budgets runs the tokenizer.
+    request = await asyncio.to_thread(_request, utils, contents, inputs)
+    if on_delta is None:
+        response = await client_async.responses.create(**request)
+        await asyncio.to_thread(record_usage, response.usage)
+        for item in response.output:
+            if hasattr(item, "arguments"):
+                return item.arguments
+        return None
+
+    stream = await client_async.responses.create(**request, stream=True)
+    extractor = AnswerDeltaExtractor()
+    arguments = None
+    async for event in stream:
+        if event.type == "response.function_call_arguments.delta":
+            delta = extractor.feed(event.delta)
+            if delta:
+                await on_delta(delta)
+        elif event.type == "response.function_call_arguments.done":
+            arguments = event.arguments
+        elif event.type == "response.completed":
+            await asyncio.to_thread(record_usage, event.response.usage)
+        elif event.type == "response.failed":
+            error = event.response.error
+            raise RuntimeError(error.message if error else "response failed")
+        elif event.type == "error":
+            raise RuntimeError(event.message)
+    return arguments
+
+
+def _request(utils: Utils, contents, inputs) -> dict:
+    return dict(
         model=utils.gpt_model,
-        input=[
-            {
-                "role": "system",
-                "content": f"""
-                {utils.base_rules}
-                {utils.base_information}
-                {utils.choose_embedding_rule}
-                
-                AVAILABLE CONTENT WITH IDs:
-                {' | '.join(f'id: {embedding.id}; content: {embedding.raw_text}' for embedding in contents)}
-                HERE ENDS CONTENT WITH IDs.
-                
-                
-                
-                """,
-            },
-            *inputs,
-        ],
+        input=chat_input(utils, contents, inputs),
         tools=tools,
         tool_choice={"type": "function", "name": "provide_id_and_answer"},
+        prompt_cache_key=prompt_cache_key(utils),
     )
-    for item in response.output:
-        if hasattr(item, "arguments"):
-            print(item.arguments)
-            return item.arguments
-
-    return None
 
 
 def get_answer_gpt_function(
@@ -77,33 +97,45 @@ def get_answer_gpt_function(
 ) -> Optional[Dict]:
     utils: Utils = get_utils()
     inputs = session_object.get_history(utils.last_message_count)
-    response = client_sync.responses.create(
-        model=utils.gpt_model,
-        input=[
-            {
-                "role": "system",
-                "content": f"""
-                **Use Markdown to format your response for clarity and emphasis:**
-- Use **bold** for emphasis (e.g., **important points**).
-- Use *italics* for subtle emphasis or tone (e.g., *sounds interesting*).
-- Use bullet points (`-`) for lists when mentioning multiple items or reasons.
-- Use numbered lists (`1.`) for ordered steps or priorities.
-- Use inline code (`text`) for technical terms or examples.
-- Use blockquotes (`>`) for highlighting key user questions or statements.
-                {utils.base_rules}
-                {utils.base_information}
-                {utils.choose_embedding_rule}
-                AVAILABLE CONTENT WITH IDs:
-                {' | '.join(f'id: {embedding.id}; content: {embedding.raw_text}' for embedding in contents)}
-                HERE ENDS CONTENT WITH IDs.
-                """,
-            },
-            *inputs,
-        ],
-        tools=tools,
-        tool_choice={"type": "function", "name": "provide_id_and_answer"},
-    )
+    request = _request(utils, contents, inputs)
+    release_db_connection()
+    response = client_sync.responses.create(**request)
+    record_usage(response.usage)
     for item in response.output:
         if hasattr(item, "arguments"):
             return item.arguments
     return None
+
+
+def get_answer_gpt_function_stream(
+    user_prompt: str,
+    contents: Embedding,
+    session_object: ChatSession,
+    on_delta: Callable[[str], None],
+) -> Optional[str]:
+    """
+    Same request as get_answer_gpt_function, streamed: on_delta receives the
+    "answer" text as the model writes it. Returns the complete arguments.
+    """
+    utils: Utils = get_utils()
+    inputs = session_object.get_history(utils.last_message_count)
+    request = _request(utils, contents, inputs)
+    release_db_connection()
+    stream = client_sync.responses.create(**request, stream=True)
+    extractor = AnswerDeltaExtractor()
+    arguments = None
+    for event in stream:
+        if event.type == "response.function_call_arguments.delta":
+            delta = extractor.feed(event.delta)
+            if delta:
+                on_delta(delta)
+        elif event.type == "response.function_call_arguments.done":
+            arguments = event.arguments
+        elif event.type == "response.completed":
+            record_usage(event.response.usage)
+        elif event.type == "response.failed":
+            error = event.response.error
+            raise RuntimeError(error.message if error else "response failed")
+        elif event.type == "error":
+            raise RuntimeError(event.message)
+    return arguments
@@ -0,0 +1,99 @@
+# rag_system/utils/chunking.py
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from django.conf import settings
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+
+
+def token_length(text: str) -> int:
+    """Number of model tokens in text, without the special tokens."""
+    from .model import get_tokenizer
+
+    tokenizer = get_tokenizer()
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of text that is at most max_tokens model tokens."""
+    from .model import get_tokenizer
+
+    if max_tokens <= 0:
+        return ""
+    offsets = get_tokenizer()(
+        text, add_special_tokens=False, return_offsets_mapping=True
+    )["offset_mapping"]
+    if len(offsets) <= max_tokens:
+        return text
+    return text[: offsets[max_tokens - 1][1]].rstrip()
+
+
+def _pieces(text: str, max_size: int, length: Callable[[str], int]) -> List[str]:
+    """Split text into paragraphs, sentences, then word runs until each piece fits."""
+    pieces = []
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if length(paragraph) <= max_size:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_SPLIT.split(paragraph):
+            if length(sentence) <= max_size:
+                pieces.append(sentence)
+                continue
+            current, current_size = [], 0
+            for word in sentence.split():
+                size = length(word)
+                if current and current_size + size > max_size:
+                    pieces.append(" ".join(current))
+                    current, current_size = [], 0
+                current.append(word)
+                current_size += size
+            if current:
+                pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text(
+    text: str,
+    max_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+    length: Optional[Callable[[str], int]] = None,
+) -> List[str]:
+    """
+    Pack paragraphs/sentences into chunks of at most ``max_size`` units of
+    ``length`` (model tokens by default), repeating up to ``overlap`` units
+    of the previous chunk's tail at the start of the next one.
+    """
+    max_size = max_size or settings.RAG_CHUNK_MAX_TOKENS
+    overlap = settings.RAG_CHUNK_OVERLAP_TOKENS if overlap is None else overlap
+    length = lru_cache(maxsize=4096)(length or token_length)
+    text = (text or "").strip()
+    if not text:
+        return []
+    if length(text) <= max_size:
+        return [text]
+
+    # sizes are summed per piece, so each piece is measured only once
+    chunks, current, current_size = [], [], 0
+    for piece in _pieces(text, max_size, length):
+        size = length(piece)
+        if current and current_size + size > max_size:
+            chunks.append(" ".join(current))
+            tail, tail_size = [], 0
+            for prev in reversed(current):
+                prev_size = length(prev)
+                if tail_size + prev_size > overlap or tail_size + prev_size + size > max_size:
+                    break
+                tail.insert(0, prev)
+                tail_size += prev_size
+            current, current_size = tail, tail_size
+        current.append(piece)
+        current_size += size
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
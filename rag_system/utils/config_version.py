@@ -0,0 +1,53 @@
+# rag_system/utils/config_version.py
+"""
+Version counter for the answer configuration (Utils and Roles rows), bumped
+on every change so caches derived from it can tell they are stale.
+"""
+import logging
+from typing import Optional
+
+import redis
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CONFIG_VERSION_KEY = "rag:config:version"
+
+# Redis runs without persistence: a missing counter is seeded from the
+# server clock (ms), as in kb_version, so after a flush it never falls back
+# to a version a process still holds in its ConfigCache.
+_SEED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    local now = redis.call('TIME')
+    redis.call('SET', KEYS[1], tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000))
+end
+"""
+_BUMP = _SEED + "return redis.call('INCR', KEYS[1])"
+_READ = _SEED + "return redis.call('GET', KEYS[1])"
+
+_scripts = {}
+
+
+def _run(source: str) -> int:
+    client = get_redis()
+    if source not in _scripts:
+        _scripts[source] = client.register_script(source)
+    return int(_scripts[source](keys=[CONFIG_VERSION_KEY]))
+
+
+def bump_config_version() -> Optional[int]:
+    try:
+        return _run(_BUMP)
+    except redis.RedisError as exc:
+        logger.warning("Could not bump config version: %s", exc)
+        return None
+
+
+def get_config_version() -> Optional[int]:
+    """Current config version, or None when Redis is unavailable."""
+    try:
+        return _run(_READ)
+    except redis.RedisError as exc:
+        logger.warning("Could not read config version: %s", exc)
+        return None
@@ -0,0 +1,13 @@
+# rag_system/utils/db.py
+from django.db import connection
+
+
+def release_db_connection():
+    """
+    Close this thread's DB connection before a long network wait such as an
+    LLM call; the next query reconnects. On the threaded LLM worker every
+    thread owns a connection, and holding them through completions would
+    exhaust Postgres max_connections long before the pool is busy.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
@@ -0,0 +1,116 @@
+# rag_system/utils/documents.py
+import logging
+import os
+from typing import List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from rag_system.models import Embedding, EmbeddingData
+from .chunking import chunk_text, token_length
+from .embeddings import content_tag_values, embedding_field_values, get_embeddings
+from .kb_version import mark_embeddings_changed
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = {".txt", ".md", ".markdown"}
+
+
+def _read_pdf(fh) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:
+        raise ImportError("pypdf is required to embed PDF files") from exc
+    return "\n\n".join(page.extract_text() or "" for page in PdfReader(fh).pages)
+
+
+def _read_docx(fh) -> str:
+    try:
+        import docx
+    except ImportError as exc:
+        raise ImportError("python-docx is required to embed DOCX files") from exc
+    return "\n\n".join(p.text for p in docx.Document(fh).paragraphs)
+
+
+def extract_text(data: EmbeddingData) -> str:
+    """Plain text of an attached file, or "" for types that are not embedded."""
+    ext = os.path.splitext(data.file.name)[1].lower()
+    with data.file.open("rb") as fh:
+        if ext in TEXT_EXTENSIONS:
+            return fh.read().decode("utf-8", errors="replace")
+        if ext == ".pdf":
+            return _read_pdf(fh)
+        if ext == ".docx":
+            return _read_docx(fh)
+    return ""
+
+
+def embed_document(embedding_id: int) -> int:
+    """
+    (Re)build the vectors of one knowledge-base document.
+
+    A short raw_text is embedded on the row itself. A long one is split into
+    token-bounded overlapping chunks stored as child rows, and so is the text
+    of every attached file. Returns the number of vectors written.
+    """
+    document = Embedding.objects.prefetch_related("data").get(id=embedding_id)
+
+    # (text, source file) for every child chunk to create
+    pieces: List[Tuple[str, EmbeddingData]] = []
+    own_text = document.raw_text or ""
+    embed_self = (
+        bool(own_text) and token_length(own_text) <= settings.RAG_CHUNK_MAX_TOKENS
+    )
+    if not embed_self:
+        pieces.extend((chunk, None) for chunk in chunk_text(own_text))
+
+    for data in document.data.all():
+        if not data.file:
+            continue
+        try:
+            text = extract_text(data)
+        except Exception:
+            logger.exception("Could not read %s", data.file.name)
+            continue
+        pieces.extend((chunk, data) for chunk in chunk_text(text))
+
+    texts = ([own_text] if embed_self else []) + [text for text, _ in pieces]
+    batch_size = settings.RAG_INGEST_BATCH_SIZE
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        vectors.extend(get_embeddings(texts[start : start + batch_size]))
+
+    own_values = (
+        embedding_field_values(vectors.pop(0))
+        if embed_self
+        else embedding_field_values(None)
+    )
+    own_values.update(content_tag_values(own_text))
+    chunks = [
+        Embedding(
+            raw_text=text,
+            parent=document,
+            source_file=data,
+            chunk_index=index,
+            **embedding_field_values(vector),
+            **content_tag_values(text),
+        )
+        for index, ((text, data), vector) in enumerate(zip(pieces, vectors))
+    ]
+
+    with transaction.atomic():
+        # regular delete: messages pointing at old chunks are SET_NULL and the
+        # post_delete signal publishes the removed ids
+        document.chunks.all().delete()
+        Embedding.objects.filter(id=document.id).update(**own_values)
+        Embedding.objects.bulk_create(chunks)
+        changed = [document.id, *(chunk.id for chunk in chunks)]
+        transaction.on_commit(lambda: mark_embeddings_changed(changed))
+
+    logger.info(
+        "Embedded document %s: %s own vector, %s chunks",
+        document.id,
+        int(embed_self),
+        len(chunks),
+    )
+    return len(chunks) + int(embed_self)
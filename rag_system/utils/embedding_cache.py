@@ -0,0 +1,123 @@
+# rag_system/utils/embedding_cache.py
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Two-level cache of query embeddings keyed on the model version, the
+    normalize flag and the normalized text hash: a bounded in-process LRU
+    in front of Redis, both with a TTL.
+    """
+
+    prefix = "rag:qemb"
+
+    def __init__(self, max_size: int = 1024, ttl: int = 3600, redis_ttl: int = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self._local: "OrderedDict[str, tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def key_for(self, normalized_text: str) -> str:
+        digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        # vectors from another encoder or normalization must not be reused
+        return (
+            f"{self.prefix}:{settings.EMBEDDING_MODEL_VERSION}:"
+            f"n{int(settings.EMBEDDING_NORMALIZE)}:{digest}"
+        )
+
+    def get_local(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            expires_at, vector = item
+            if expires_at < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            self.local_hits += 1
+            return vector
+
+    def set_local(self, key: str, vector: List[float]):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, vector)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+
+    def get_shared(self, key: str) -> Optional[List[float]]:
+        try:
+            raw = get_redis().get(key)
+        except redis.RedisError as exc:
+            logger.warning("Query embedding cache unavailable: %s", exc)
+            raw = None
+        if raw is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = np.frombuffer(raw, dtype=np.float32).tolist()
+        with self._lock:
+            self.redis_hits += 1
+        self.set_local(key, vector)
+        return vector
+
+    def get(self, normalized_text: str) -> Optional[List[float]]:
+        key = self.key_for(normalized_text)
+        vector = self.get_local(key)
+        if vector is None:
+            vector = self.get_shared(key)
+        return vector
+
+    def set(self, normalized_text: str, vector: List[float]):
+        key = self.key_for(normalized_text)
+        self.set_local(key, vector)
+        try:
+            get_redis().set(
+                key, np.asarray(vector, dtype=np.float32).tobytes(), ex=self.redis_ttl
+            )
+        except redis.RedisError as exc:
+            logger.warning("Query embedding cache unavailable: %s", exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": (
+                    (self.local_hits + self.redis_hits) / lookups if lookups else 0.0
+                ),
+                "size": len(self._local),
+            }
+
+
+_cache = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = QueryEmbeddingCache(
+            max_size=settings.EMBEDDING_CACHE_MAX_SIZE,
+            ttl=settings.EMBEDDING_CACHE_LOCAL_TTL,
+            redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL,
+        )
+    return _cache
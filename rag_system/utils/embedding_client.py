@@ -0,0 +1,72 @@
+# rag_system/utils/embedding_client.py
+"""
+Client for the embedding server (``manage.py run_embedding_server``).
+
+Vectors travel as raw little-endian float32 rows, which is far cheaper to
+produce and parse than JSON for hundreds of 768-dim vectors.
+"""
+import asyncio
+import os
+import threading
+from typing import List, Optional, Sequence
+
+import httpx
+import numpy as np
+from django.conf import settings
+
+BINARY = "application/octet-stream"
+
+
+def _decode(response: httpx.Response, count: int) -> List[List[float]]:
+    response.raise_for_status()
+    matrix = np.frombuffer(response.content, dtype="<f4")
+    return matrix.reshape(count, -1).tolist() if count else []
+
+
+class EmbeddingServerClient:
+    """Pooled keep-alive HTTP client; one per process (reset after fork)."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/") + "/embed"
+        self.timeout = timeout
+        self._client = httpx.Client(timeout=timeout)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Vectors for already normalized texts."""
+        response = self._client.post(
+            self.url, json={"texts": list(texts)}, headers={"Accept": BINARY}
+        )
+        return _decode(response, len(texts))
+
+    async def aembed(self, texts: Sequence[str]) -> List[List[float]]:
+        loop = asyncio.get_running_loop()
+        # an AsyncClient's connections belong to the loop that opened them
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout)
+            self._async_loop = loop
+        response = await self._async_client.post(
+            self.url, json={"texts": list(texts)}, headers={"Accept": BINARY}
+        )
+        return _decode(response, len(texts))
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_embedding_client() -> Optional[EmbeddingServerClient]:
+    """Client for EMBEDDING_SERVER_URL, or None to encode in this process."""
+    global _client, _client_pid
+    if not settings.EMBEDDING_SERVER_URL:
+        return None
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = EmbeddingServerClient(
+                    settings.EMBEDDING_SERVER_URL, settings.EMBEDDING_SERVER_TIMEOUT
+                )
+                _client_pid = os.getpid()
+    return _client
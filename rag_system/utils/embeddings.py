@@ -2,20 +2,39 @@
 
 # model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
 
+import hashlib
 import re
+from typing import List
 from django.conf import settings
 from .model import get_embedding_model
+from .batcher import get_embedding_batcher
+from .embedding_cache import get_query_embedding_cache
+from .embedding_client import get_embedding_client
 
 import asyncio
 
 
+def _encode_one(clean: str):
+    """From the embedding server when EMBEDDING_SERVER_URL is set, else locally."""
+    client = get_embedding_client()
+    if client is not None:
+        return client.embed([clean])[0]
+    return get_embedding_batcher().submit(clean).result()
+
+
+async def _encode_one_async(clean: str):
+    client = get_embedding_client()
+    if client is not None:
+        return (await client.aembed([clean]))[0]
+    return await asyncio.wrap_future(get_embedding_batcher().submit(clean))
+
+
 async def get_embedding_async(text: str):
     clean = normalize_text(text)
-    return await asyncio.to_thread(lambda: get_embedding_model().encode(clean).tolist())
+    return await _encode_one_async(clean)
 
 
 def normalize_text(text: str) -> str:
-    print(text)
     text = text.lower()
     text = re.sub(r"[^\w\s]", " ", text)
     text = re.sub(r"\s+", " ", text).strip()
@@ -24,4 +43,101 @@ def normalize_text(text: str) -> str:
 
 def get_embedding(text: str):
     clean = normalize_text(text)
-    return get_embedding_model().encode(clean).tolist()
+    return _encode_one(clean)
+
+
+def encode_batch(texts: List[str]) -> List[List[float]]:
+    """Encode already normalized texts in one forward pass per batch."""
+    return (
+        get_embedding_model()
+        .encode(
+            texts,
+            batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            normalize_embeddings=settings.EMBEDDING_NORMALIZE,
+        )
+        .tolist()
+    )
+
+
+def vector_field_names() -> List[str]:
+    """Embedding columns that receive a freshly encoded document vector."""
+    if settings.EMBEDDING_STORE_HALFVEC:
+        return ["embedded_vector", "embedded_halfvec"]
+    return ["embedded_vector"]
+
+
+def embedding_field_values(vector: List[float]) -> dict:
+    return {field: vector for field in vector_field_names()}
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def content_tag_values(text: str) -> dict:
+    """Tags recording which text and model version a row's vectors came from."""
+    return {
+        "content_hash": content_hash(text),
+        "embedding_model": settings.EMBEDDING_MODEL_VERSION,
+    }
+
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Encode many texts at once, bypassing the batching window."""
+    clean = [normalize_text(text) for text in texts]
+    client = get_embedding_client()
+    if client is not None:
+        return client.embed(clean)
+    return encode_batch(clean)
+
+
+def get_query_embedding(text: str):
+    """Embedding for a user question, served from the query cache when possible."""
+    clean = normalize_text(text)
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return _encode_query(clean)
+
+    cache = get_query_embedding_cache()
+    vector = cache.get(clean)
+    if vector is None:
+        vector = _encode_query(clean)
+        cache.set(clean, vector)
+    return vector
+
+
+def _encode_query(clean: str):
+    """
+    Encode on the embedding server, on this process's batcher thread, or
+    with EMBEDDING_OFFLOAD=celery on the embedding workers, so processes
+    serving I/O (ASGI, worker-llm) never load the model or spend CPU on it.
+    """
+    if settings.EMBEDDING_OFFLOAD == "celery" and get_embedding_client() is None:
+        from rag_system.tasks import create_embedding_task
+
+        # the embeddings queue is served by another pool, so waiting is safe
+        return create_embedding_task.apply_async(args=[clean]).get(
+            timeout=settings.EMBEDDING_OFFLOAD_TIMEOUT, disable_sync_subtasks=False
+        )
+    return _encode_one(clean)
+
+
+async def _encode_query_async(clean: str):
+    if settings.EMBEDDING_OFFLOAD == "celery" and get_embedding_client() is None:
+        return await asyncio.to_thread(_encode_query, clean)
+    return await _encode_one_async(clean)
+
+
+async def get_query_embedding_async(text: str):
+    clean = normalize_text(text)
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return await _encode_query_async(clean)
+
+    cache = get_query_embedding_cache()
+    key = cache.key_for(clean)
+    vector = cache.get_local(key)
+    if vector is None:
+        vector = await asyncio.to_thread(cache.get_shared, key)
+    if vector is None:
+        vector = await _encode_query_async(clean)
+        await asyncio.to_thread(cache.set, clean, vector)
+    return vector
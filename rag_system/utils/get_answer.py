@@ -1,18 +1,57 @@
 from . import chat_gpt_function_calling
-from rag_system.utils.embeddings import get_embedding_async, get_embedding
+from rag_system.utils.embeddings import (
+    get_query_embedding,
+    get_query_embedding_async,
+)
 from rag_system.utils.search import search_documents_async, search_documents
-from typing import Optional, Dict
+from rag_system.utils.answer_cache import answer_payload, get_answer_cache
+from rag_system.utils.gpt_rules import get_utils
+import asyncio
+from channels.db import database_sync_to_async
+from typing import Awaitable, Callable, Optional, Dict
+from django.conf import settings
 from miniapp.models import ChatSession
 
 
-async def get_answer_async(prompt: str) -> Optional[Dict]:
-    embedding = await get_embedding_async(prompt)
-    objects = await search_documents_async(embedding, top_k=5)
+def _standalone_question(session: ChatSession) -> bool:
+    """
+    True when the prompt carries no earlier turns besides the question, so
+    the answer depends on the question alone and may be shared via the
+    semantic answer cache.
+    """
+    utils = get_utils()
+    return len(session.get_history(utils.last_message_count)) <= 1
+
+
+async def get_answer_async(
+    prompt: str,
+    session: ChatSession,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Optional[Dict]:
+    embedding = await get_query_embedding_async(prompt)
+    cache = get_answer_cache()
+    if cache is not None and not await database_sync_to_async(_standalone_question)(
+        session
+    ):
+        cache = None
+    if cache is not None:
+        cached, scope = await asyncio.to_thread(cache.lookup, embedding)
+        if cached is not None:
+            if on_delta is not None:
+                await on_delta(cached["answer"])
+            return cached
+
+    objects = await search_documents_async(
+        embedding, top_k=settings.RAG_SEARCH_TOP_K, text=prompt
+    )
 
     result = await chat_gpt_function_calling.get_answer_gpt_function_async(
-        prompt, objects
+        prompt, objects, session, on_delta
     )
 
+    payload = answer_payload(result)
+    if cache is not None and payload is not None:
+        await asyncio.to_thread(cache.store, scope, embedding, payload)
     return result
 
 
@@ -22,9 +61,41 @@ logger = logging.getLogger(__name__)
 
 
 def get_answer_sync(prompt: str, session: ChatSession) -> Optional[Dict]:
-    embedding = get_embedding(prompt)
-    objects = search_documents(embedding, top_k=5)
+    return get_answer_stream(prompt, session, None)
+
+
+def get_answer_stream(
+    prompt: str, session: ChatSession, on_delta: Optional[Callable[[str], None]]
+) -> Optional[str]:
+    """
+    Embed, search and ask the LLM; with on_delta the answer is streamed.
+    Near-duplicate opening questions are answered from the semantic answer
+    cache; follow-ups depend on the history and always go to the LLM.
+    """
+    embedding = get_query_embedding(prompt)
+    cache = get_answer_cache()
+    if cache is not None and not _standalone_question(session):
+        cache = None
+    if cache is not None:
+        cached, scope = cache.lookup(embedding)
+        if cached is not None:
+            logger.info("Answer cache hit")
+            if on_delta is not None:
+                on_delta(cached["answer"])
+            return cached
+
+    objects = search_documents(embedding, top_k=settings.RAG_SEARCH_TOP_K, text=prompt)
     logger.info(objects)
-    result = chat_gpt_function_calling.get_answer_gpt_function(prompt, objects, session)
+    if on_delta is None:
+        result = chat_gpt_function_calling.get_answer_gpt_function(
+            prompt, objects, session
+        )
+    else:
+        result = chat_gpt_function_calling.get_answer_gpt_function_stream(
+            prompt, objects, session, on_delta
+        )
 
+    payload = answer_payload(result)
+    if cache is not None and payload is not None:
+        cache.store(scope, embedding, payload)
     return result
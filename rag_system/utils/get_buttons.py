@@ -1,4 +1,4 @@
-from rag_system.models import Roles
+from rag_system.utils.gpt_rules import get_roles
 from miniapp.models import ChatSession
 
 
@@ -9,7 +9,7 @@ def get_buttons(session: ChatSession):
         return {
             "roles": [
                 {"role_name": role.name, "role_id": role.id}
-                for role in Roles.objects.all()
+                for role in get_roles()
             ]
         }
     return {"buttons": ["/Тренажер"]}
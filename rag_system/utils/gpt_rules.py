@@ -16,43 +16,62 @@ Protect privacy: never reveal or store user data.
 """
 
 
-from rag_system.models import Utils
+import threading
+from typing import Callable, List, Optional
 
-from typing import Optional, Awaitable
 from channels.db import database_sync_to_async
 
-from django.core.cache import cache
-from django.utils.functional import cached_property
+from rag_system.models import Roles, Utils
 
+from .config_version import get_config_version
 
-# Cache for 1 hour (3600 seconds)
-@database_sync_to_async
-def get_utils_async() -> Optional[Utils]:
-    cache_key = "active_utils_object"
-    cached_utils = cache.get(cache_key)
 
-    # if cached_utils is not None:
-    #     return cached_utils
+class ConfigCache:
+    """
+    Process-local copies of rarely edited config rows, valid for one value of
+    the Redis config version (bumped by the Utils/Roles signals after commit).
+    Each read costs a Redis GET instead of a database query, and every process
+    sees an admin edit on its next read. Without Redis it just queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, name: str, load: Callable):
+        version = get_config_version()
+        if version is not None:
+            with self._lock:
+                entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        value = load()
+        if version is not None:
+            with self._lock:
+                self._entries[name] = (version, value)
+        return value
 
-    utils = Utils.objects.filter(is_active=True).first()
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
 
-    if utils:
-        cache.set(cache_key, utils, 3600)
 
-    return utils
+config_cache = ConfigCache()
+
+
+def _load_utils() -> Optional[Utils]:
+    return Utils.objects.filter(is_active=True).first()
 
 
 def get_utils() -> Optional[Utils]:
-    cache_key = "active_utils_object"
-    cached_utils = cache.get(cache_key)
+    return config_cache.get("utils", _load_utils)
 
-    if cached_utils is not None:
-        return cached_utils
 
-    utils = Utils.objects.filter(is_active=True).first()
+@database_sync_to_async
+def get_utils_async() -> Optional[Utils]:
+    return get_utils()
 
-    # Cache the result for 1 hour
-    # if utils:
-    #     cache.set(cache_key, utils, 3600)
 
-    return utils
+def get_roles() -> List[Roles]:
+    return config_cache.get("roles", lambda: list(Roles.objects.all()))
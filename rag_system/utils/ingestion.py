@@ -0,0 +1,229 @@
+# rag_system/utils/ingestion.py
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from rag_system.models import Embedding, IngestionJob
+from .chunking import chunk_text
+from .embeddings import (
+    content_tag_values,
+    embedding_field_values,
+    get_embeddings,
+    vector_field_names,
+)
+from .kb_version import mark_embeddings_changed
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+    ".md": "md",
+    ".markdown": "md",
+}
+TEXT_FIELDS = ("raw_text", "text", "content")
+
+_MD_HEADING = re.compile(r"^#{1,6}\s", re.MULTILINE)
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"Unsupported file type {ext!r}, expected one of {list(FORMATS)}")
+    return FORMATS[ext]
+
+
+def file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pick_text(record: dict, text_field: Optional[str]) -> str:
+    if text_field:
+        return str(record.get(text_field) or "")
+    for field in TEXT_FIELDS:
+        if record.get(field):
+            return str(record[field])
+    return ""
+
+
+def read_records(path: str, fmt: str, text_field: Optional[str] = None) -> Iterator[str]:
+    """Yield one text per source record: a JSONL line, a CSV row or a Markdown section."""
+    with open(path, encoding="utf-8", newline="") as fh:
+        if fmt == "jsonl":
+            for line_number, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, str):
+                    yield record
+                elif isinstance(record, dict):
+                    yield _pick_text(record, text_field)
+                else:
+                    # still counted, so resumed jobs keep their record offsets
+                    logger.warning(
+                        "%s:%d: skipping %s record", path, line_number, type(record).__name__
+                    )
+                    yield ""
+        elif fmt == "csv":
+            for row in csv.DictReader(fh):
+                yield _pick_text(row, text_field)
+        elif fmt == "md":
+            text = fh.read()
+            starts = [m.start() for m in _MD_HEADING.finditer(text)]
+            bounds = [0] + starts if not starts or starts[0] != 0 else starts
+            for start, end in zip(bounds, bounds[1:] + [len(text)]):
+                yield text[start:end].strip()
+        else:
+            raise ValueError(f"Unknown format {fmt!r}")
+
+
+# ------------------------------- writers --------------------------------------
+
+
+def _bulk_create(texts: Sequence[str], vectors: Sequence[List[float]]) -> List[int]:
+    objs = [
+        Embedding(
+            raw_text=text, **embedding_field_values(vector), **content_tag_values(text)
+        )
+        for text, vector in zip(texts, vectors)
+    ]
+    Embedding.objects.bulk_create(objs, batch_size=1000)
+    return [obj.id for obj in objs]
+
+
+def _copy_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy(texts: Sequence[str], vectors: Sequence[List[float]]) -> List[int]:
+    """COPY rows in (psycopg2 copy_expert); ids are read back afterwards."""
+    table = Embedding._meta.db_table
+    vector_columns = vector_field_names()
+    columns = ["raw_text", "content_hash", "embedding_model"] + vector_columns
+    buf = io.StringIO()
+    for text, vector in zip(texts, vectors):
+        literal = "[" + ",".join(f"{x:.8g}" for x in vector) + "]"
+        tags = content_tag_values(text)
+        buf.write(
+            "\t".join(
+                [
+                    _copy_escape(text),
+                    tags["content_hash"],
+                    _copy_escape(tags["embedding_model"]),
+                ]
+                + [literal] * len(vector_columns)
+            )
+        )
+        buf.write("\n")
+    buf.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        (before,) = cursor.fetchone()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+        # may include rows inserted concurrently; they are only re-read by indexes
+        cursor.execute(f"SELECT id FROM {table} WHERE id > %s", [before])
+        return [row[0] for row in cursor.fetchall()]
+
+
+WRITERS = {"bulk": _bulk_create, "copy": _copy}
+
+
+# ------------------------------- pipeline -------------------------------------
+
+
+def ingest_file(
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    method: str = "bulk",
+    text_field: Optional[str] = None,
+    progress: Optional[Callable[[IngestionJob, float], None]] = None,
+) -> IngestionJob:
+    """
+    Chunk, encode and store every record of ``path``. Progress is committed
+    together with each batch, so a rerun on the same file resumes after the
+    last committed record.
+    """
+    path = os.path.abspath(path)
+    fmt = fmt or detect_format(path)
+    batch_size = batch_size or settings.RAG_INGEST_BATCH_SIZE
+    write = WRITERS[method]
+
+    job, _ = IngestionJob.objects.get_or_create(
+        source=path, checksum=file_checksum(path)
+    )
+    if job.status == IngestionJob.DONE:
+        logger.info("%s already ingested, skipping", path)
+        return job
+    job.status = IngestionJob.RUNNING
+    job.error = ""
+    job.save(update_fields=["status", "error", "updated_at"])
+
+    started = time.monotonic()
+    resumed_from = job.processed_records
+    pending_records, pending_chunks = 0, []
+
+    def flush():
+        nonlocal pending_records, pending_chunks
+        vectors = get_embeddings(pending_chunks) if pending_chunks else []
+        with transaction.atomic():
+            ids = write(pending_chunks, vectors) if pending_chunks else []
+            job.processed_records += pending_records
+            job.created_embeddings += len(pending_chunks)
+            job.save(
+                update_fields=["processed_records", "created_embeddings", "updated_at"]
+            )
+            transaction.on_commit(lambda: mark_embeddings_changed(ids))
+        pending_records, pending_chunks = 0, []
+
+        elapsed = time.monotonic() - started
+        rate = (job.processed_records - resumed_from) / elapsed if elapsed else 0.0
+        if progress:
+            progress(job, rate)
+        logger.info(
+            "Ingest %s: %s records, %s embeddings, %.1f docs/sec",
+            path,
+            job.processed_records,
+            job.created_embeddings,
+            rate,
+        )
+
+    try:
+        for number, text in enumerate(read_records(path, fmt, text_field)):
+            if number < resumed_from:
+                continue
+            pending_records += 1
+            pending_chunks.extend(chunk_text(text))
+            if len(pending_chunks) >= batch_size:
+                flush()
+        flush()
+    except Exception as exc:
+        job.status = IngestionJob.FAILED
+        job.error = str(exc)
+        job.save(update_fields=["status", "error", "updated_at"])
+        raise
+
+    job.status = IngestionJob.DONE
+    job.save(update_fields=["status", "updated_at"])
+    return job
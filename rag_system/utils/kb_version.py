@@ -0,0 +1,96 @@
+# rag_system/utils/kb_version.py
+"""
+Knowledge-base change log shared by all processes through Redis.
+
+Every change to Embedding rows bumps a version counter and records the
+changed ids with that version, so in-process indexes and caches can catch
+up incrementally instead of reloading the whole table.
+"""
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KB_VERSION_KEY = "rag:kb:version"
+KB_CHANGES_KEY = "rag:kb:changes"  # zset: embedding id -> version of last change
+KB_FLOOR_KEY = "rag:kb:changes:floor"  # highest version trimmed from the zset
+
+# INCR and ZADD must be atomic, otherwise a reader can see the new version
+# before the ids that belong to it. Redis runs without persistence, so a
+# fresh counter starts from the server clock (ms) to stay above any version
+# a process remembers from before a restart.
+_MARK_CHANGED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    local now = redis.call('TIME')
+    redis.call('SET', KEYS[1], tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000))
+end
+local version = redis.call('INCR', KEYS[1])
+for _, id in ipairs(ARGV) do
+    redis.call('ZADD', KEYS[2], version, id)
+end
+return version
+"""
+
+_mark_script = None
+
+
+def mark_embeddings_changed(ids: Iterable[int]) -> Optional[int]:
+    """Record that the given Embedding rows were created, updated or deleted."""
+    global _mark_script
+    ids = [str(pk) for pk in ids]
+    if not ids:
+        return None
+    try:
+        client = get_redis()
+        if _mark_script is None:
+            _mark_script = client.register_script(_MARK_CHANGED)
+        version = int(_mark_script(keys=[KB_VERSION_KEY, KB_CHANGES_KEY], args=ids))
+        _trim_changes(client)
+        return version
+    except redis.RedisError as exc:
+        logger.warning("Could not record knowledge-base change %s: %s", ids, exc)
+        return None
+
+
+def _trim_changes(client: redis.Redis):
+    overflow = client.zcard(KB_CHANGES_KEY) - settings.RAG_KB_CHANGELOG_SIZE
+    if overflow <= 0:
+        return
+    trimmed = client.zrange(KB_CHANGES_KEY, 0, overflow - 1, withscores=True)
+    if trimmed:
+        floor = int(trimmed[-1][1])
+        client.set(KB_FLOOR_KEY, max(floor, int(client.get(KB_FLOOR_KEY) or 0)))
+        client.zremrangebyrank(KB_CHANGES_KEY, 0, overflow - 1)
+
+
+def get_kb_version() -> Optional[int]:
+    """Current knowledge-base version, or None when Redis is unavailable."""
+    try:
+        return int(get_redis().get(KB_VERSION_KEY) or 0)
+    except redis.RedisError as exc:
+        logger.warning("Could not read knowledge-base version: %s", exc)
+        return None
+
+
+def get_changes_since(version: int) -> Tuple[int, Optional[List[int]]]:
+    """
+    Return (current_version, changed_ids) after ``version``. changed_ids is
+    None when the change log no longer covers ``version`` and the caller has
+    to reload everything.
+    """
+    client = get_redis()
+    with client.pipeline(transaction=True) as pipe:
+        pipe.get(KB_VERSION_KEY)
+        pipe.get(KB_FLOOR_KEY)
+        pipe.zrangebyscore(KB_CHANGES_KEY, f"({version}", "+inf")
+        current, floor, changed = pipe.execute()
+
+    current, floor = int(current or 0), int(floor or 0)
+    if version < floor or version > current:
+        return current, None
+    return current, [int(pk) for pk in changed]
@@ -1,12 +1,46 @@
 # rag_system/utils.py
 from django.conf import settings
-from sentence_transformers import SentenceTransformer
 import os
 
 
+def get_model_path():
+    return os.path.join(settings.BASE_DIR, "models", settings.EMBEDDING_MODEL_NAME)
+
+
+def load_embedding_model(backend=None, onnx_file=None):
+    """
+    A fresh SentenceTransformer for the configured model. backend "torch" runs
+    PyTorch; "onnx" runs ONNX Runtime on ``onnx_file`` (relative to the model
+    directory), as written by ``manage.py export_embedding_onnx``.
+    """
+    # imported here: processes that embed through the embedding server
+    # never pay for torch
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or settings.EMBEDDING_BACKEND
+    model_path = get_model_path()
+    print(model_path)
+    if backend == "onnx":
+        return SentenceTransformer(
+            model_path,
+            backend="onnx",
+            model_kwargs={"file_name": onnx_file or settings.EMBEDDING_ONNX_FILE},
+        )
+    return SentenceTransformer(model_path)
+
+
 def get_embedding_model():
     if not hasattr(settings, "EMBEDDINGMODEL"):
-        model_path = os.path.join(settings.BASE_DIR, "models/multilingual-e5-base")
-        print(model_path)
-        settings.EMBEDDINGMODEL = SentenceTransformer(model_path)
+        settings.EMBEDDINGMODEL = load_embedding_model()
     return settings.EMBEDDINGMODEL
+
+
+def get_tokenizer():
+    """The model's tokenizer, loaded on its own when the model is not."""
+    if hasattr(settings, "EMBEDDINGMODEL"):
+        return settings.EMBEDDINGMODEL.tokenizer
+    if not hasattr(settings, "EMBEDDINGTOKENIZER"):
+        from transformers import AutoTokenizer
+
+        settings.EMBEDDINGTOKENIZER = AutoTokenizer.from_pretrained(get_model_path())
+    return settings.EMBEDDINGTOKENIZER
@@ -0,0 +1,147 @@
+# rag_system/utils/prompt.py
+"""
+Prompt layout for the RAG answer call.
+
+OpenAI caches the longest previously seen prefix of a request (tools first,
+then input) once it passes 1024 tokens. The input is therefore laid out as
+
+    1. static system message: formatting rules + Utils rules/information,
+       byte-identical for every question while the active Utils is unchanged
+    2. retrieved content for this question
+    3. conversation history
+
+so only 2 and 3 are billed and processed at full price. Both are cut to
+token budgets (RAG_CONTEXT_TOKEN_BUDGET, RAG_HISTORY_TOKEN_BUDGET) so the
+prompt size stays bounded whatever the chunk and message lengths.
+"""
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from .chunking import token_length, truncate_tokens
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+USAGE_KEY = "rag:llm:usage"
+
+FORMATTING_RULES = """**Use Markdown to format your response for clarity and emphasis:**
+- Use **bold** for emphasis (e.g., **important points**).
+- Use *italics* for subtle emphasis or tone (e.g., *sounds interesting*).
+- Use bullet points (`-`) for lists when mentioning multiple items or reasons.
+- Use numbered lists (`1.`) for ordered steps or priorities.
+- Use inline code (`text`) for technical terms or examples.
+- Use blockquotes (`>`) for highlighting key user questions or statements."""
+
+
+def static_prefix(utils) -> str:
+    """The cacheable system message; depends on the Utils row only."""
+    return "\n\n".join(
+        part.strip()
+        for part in (
+            FORMATTING_RULES,
+            utils.base_rules,
+            utils.base_information,
+            utils.choose_embedding_rule,
+        )
+        if part and part.strip()
+    )
+
+
+def fit_contents(
+    contents: Iterable, budget: int, min_chunk: int = 0
+) -> List[Tuple[int, str]]:
+    """
+    (id, text) of the retrieved chunks, in search order (best match first),
+    until ``budget`` tokens are used. The chunk that overflows is truncated
+    when at least ``min_chunk`` tokens of it fit; the rest are dropped.
+    """
+    fitted = []
+    remaining = budget
+    for embedding in contents:
+        text = embedding.raw_text or ""
+        size = token_length(text)
+        if size > remaining:
+            if remaining >= max(min_chunk, 1):
+                fitted.append((embedding.id, truncate_tokens(text, remaining)))
+            break
+        fitted.append((embedding.id, text))
+        remaining -= size
+    if len(fitted) < len(contents):
+        logger.debug("Context budget kept %s of %s chunks", len(fitted), len(contents))
+    return fitted
+
+
+def fit_history(history: List[dict], budget: int) -> List[dict]:
+    """
+    The newest messages that fit in ``budget`` tokens, oldest dropped first.
+    The last message (the question being answered) is always kept.
+    """
+    kept = []
+    remaining = budget
+    for message in reversed(history):
+        size = token_length(message["content"] or "")
+        if kept and size > remaining:
+            break
+        kept.append(message)
+        remaining -= size
+    kept.reverse()
+    return kept
+
+
+def content_message(contents: List[Tuple[int, str]]) -> dict:
+    listing = " | ".join(f"id: {id}; content: {text}" for id, text in contents)
+    return {
+        "role": "system",
+        "content": f"AVAILABLE CONTENT WITH IDs:\n{listing}\nHERE ENDS CONTENT WITH IDs.",
+    }
+
+
+def chat_input(utils, contents: List, history: List[dict]) -> List[dict]:
+    contents = fit_contents(
+        contents,
+        settings.RAG_CONTEXT_TOKEN_BUDGET,
+        settings.RAG_CONTEXT_MIN_CHUNK_TOKENS,
+    )
+    return [
+        {"role": "system", "content": static_prefix(utils)},
+        content_message(contents),
+        *fit_history(history, settings.RAG_HISTORY_TOKEN_BUDGET),
+    ]
+
+
+def prompt_cache_key(utils) -> str:
+    """Routes requests sharing the static prefix to the same cache shard."""
+    return f"ewa-rag-utils-{utils.pk}"
+
+
+def record_usage(usage) -> Optional[dict]:
+    """
+    Log the token usage of a response and add it to the USAGE_KEY hash
+    (requests, input_tokens, cached_tokens, output_tokens).
+    """
+    if usage is None:
+        return None
+    details = getattr(usage, "input_tokens_details", None)
+    counts = {
+        "requests": 1,
+        "input_tokens": usage.input_tokens or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "output_tokens": usage.output_tokens or 0,
+    }
+    logger.info(
+        "LLM usage: %s input (%s cached), %s output",
+        counts["input_tokens"],
+        counts["cached_tokens"],
+        counts["output_tokens"],
+    )
+    try:
+        with get_redis().pipeline(transaction=False) as pipe:
+            for field, value in counts.items():
+                pipe.hincrby(USAGE_KEY, field, value)
+            pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning("Could not record LLM usage: %s", exc)
+    return counts
@@ -0,0 +1,16 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared sync Redis client for rag_system caches (own DB, see RAG_REDIS_URL)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.RAG_REDIS_URL,
+            socket_timeout=settings.RAG_REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.RAG_REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
@@ -0,0 +1,119 @@
+# rag_system/utils/reembedding.py
+"""
+Incremental re-embedding.
+
+Every row stores the sha256 of the text its vector was computed from and
+the EMBEDDING_MODEL_VERSION that encoded it. Rows where either no longer
+matches are found in SQL and re-embedded in batches, so an edit or a model
+swap costs work proportional to what changed.
+"""
+import logging
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Exists, F, Func, OuterRef, Q
+
+from rag_system.models import Embedding, EmbeddingData
+from .chunking import token_length
+from .documents import embed_document
+from .embeddings import (
+    content_tag_values,
+    embedding_field_values,
+    get_embeddings,
+    vector_field_names,
+)
+from .kb_version import mark_embeddings_changed
+
+logger = logging.getLogger(__name__)
+
+
+class TextSHA256(Func):
+    """Hex sha256 of a text column using PostgreSQL built-ins (no pgcrypto)."""
+
+    template = "encode(sha256(convert_to(%(expressions)s, 'UTF8')), 'hex')"
+    output_field = CharField()
+
+
+def stale_embeddings():
+    """Rows whose raw_text or model version differs from what was embedded."""
+    return Embedding.objects.annotate(current_hash=TextSHA256("raw_text")).filter(
+        Q(content_hash__isnull=True)
+        | ~Q(content_hash=F("current_hash"))
+        | Q(embedding_model__isnull=True)
+        | ~Q(embedding_model=settings.EMBEDDING_MODEL_VERSION)
+    )
+
+
+def _reembed_rows(rows: List[Embedding]) -> int:
+    """Encode standalone rows together and write them back in one statement."""
+    if not rows:
+        return 0
+    vectors = get_embeddings([row.raw_text for row in rows])
+    for row, vector in zip(rows, vectors):
+        values = {**embedding_field_values(vector), **content_tag_values(row.raw_text)}
+        for field, value in values.items():
+            setattr(row, field, value)
+
+    with transaction.atomic():
+        Embedding.objects.bulk_update(
+            rows, vector_field_names() + ["content_hash", "embedding_model"]
+        )
+        ids = [row.id for row in rows]
+        transaction.on_commit(lambda: mark_embeddings_changed(ids))
+    return len(rows)
+
+
+def reembed_stale(
+    batch_size: Optional[int] = None, deadline: Optional[float] = None
+) -> int:
+    """
+    Re-embed every stale row, ``batch_size`` rows per encode. Chunks and
+    documents with chunks or files are rebuilt through embed_document.
+    Stops early once time.monotonic() passes ``deadline``; the next run
+    picks up whatever is still stale. Returns the number of vectors written.
+    """
+    batch_size = batch_size or settings.RAG_INGEST_BATCH_SIZE
+    last_id, total = 0, 0
+    rebuilt = set()
+
+    while deadline is None or time.monotonic() < deadline:
+        rows = list(
+            stale_embeddings()
+            .filter(id__gt=last_id)
+            .annotate(
+                has_chunks=Exists(Embedding.objects.filter(parent=OuterRef("pk"))),
+                has_files=Exists(EmbeddingData.objects.filter(embedding=OuterRef("pk"))),
+            )
+            .order_by("id")
+            .only("id", "parent_id", "raw_text")[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        plain, documents = [], []
+        for row in rows:
+            document_id = row.parent_id
+            if document_id is None and (
+                row.has_chunks
+                or row.has_files
+                or token_length(row.raw_text) > settings.RAG_CHUNK_MAX_TOKENS
+            ):
+                document_id = row.id
+            if document_id is None:
+                plain.append(row)
+            elif document_id not in rebuilt:
+                rebuilt.add(document_id)
+                documents.append(document_id)
+
+        total += _reembed_rows(plain)
+        for document_id in documents:
+            try:
+                total += embed_document(document_id)
+            except Embedding.DoesNotExist:
+                continue
+        logger.info("Re-embedded %s vectors (last id %s)", total, last_id)
+
+    return total
@@ -1,23 +1,202 @@
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
 from rag_system.models import Embedding
 from .embeddings import get_embedding
-from pgvector.django import CosineDistance
+from pgvector import HalfVector, Vector
+from pgvector.django import CosineDistance, MaxInnerProduct
+
+DISTANCES = {
+    "cosine": CosineDistance,
+    # negative inner product; equals cosine ordering on normalized vectors
+    "inner_product": MaxInnerProduct,
+}
+# the same distances as SQL operators, for hand-written queries
+DISTANCE_OPERATORS = {"cosine": "<=>", "inner_product": "<#>"}
+# columns never needed by the answer pipeline
+HEAVY_FIELDS = ("embedded_vector", "embedded_halfvec", "search_vector")
+
+
+def _tune_vector_search(ef_search: Optional[int] = None, probes: Optional[int] = None):
+    """
+    Per-query ANN knobs. set_config(..., true) is the SET LOCAL form, so it
+    only lives until the surrounding transaction ends.
+    """
+    ef_search = ef_search or settings.VECTOR_SEARCH_EF_SEARCH
+    probes = probes or settings.VECTOR_SEARCH_PROBES
+    with connection.cursor() as cursor:
+        if ef_search:
+            cursor.execute(
+                "SELECT set_config('hnsw.ef_search', %s, true)", [str(ef_search)]
+            )
+        if probes:
+            cursor.execute(
+                "SELECT set_config('ivfflat.probes', %s, true)", [str(probes)]
+            )
+
+
+class PgVectorBackend:
+    """
+    Nearest neighbours straight from Postgres through the pgvector index.
+    RAG_SEARCH_COLUMN / RAG_SEARCH_DISTANCE pick the column and operator;
+    they must match an index (embedded_vector+cosine, embedded_halfvec+inner_product).
+    """
+
+    def search(
+        self, query, top_k=5, ef_search=None, probes=None, **kwargs
+    ) -> List[Embedding]:
+        column = settings.RAG_SEARCH_COLUMN
+        distance = DISTANCES[settings.RAG_SEARCH_DISTANCE]
+        if column == "embedded_halfvec":
+            query = HalfVector(query)
+
+        with transaction.atomic():
+            _tune_vector_search(ef_search, probes)
+            return list(
+                Embedding.objects.defer(*HEAVY_FIELDS)
+                .exclude(**{column: None})
+                .order_by(distance(column, query))[:top_k]
+            )
+
+
+class HybridBackend:
+    """
+    Vector and full-text (Embedding.search_vector, GIN-indexed) candidates
+    from one SQL statement, fused with reciprocal rank fusion:
+    score = sum(1 / (RAG_HYBRID_RRF_K + rank)) over both lists. Exact
+    lexical hits such as product names and SKUs rank high even when their
+    cosine similarity is mediocre. Needs the query text as ``text``;
+    without it this is plain vector search.
+    """
+
+    # The text query ORs the lexemes of the question (plainto_tsquery would
+    # AND them, and a whole question rarely matches one chunk). Lexemes are
+    # already stemmed by the russian config, hence 'simple' when re-parsing.
+    SQL = """
+        WITH query AS (
+            SELECT to_tsquery('simple', COALESCE(string_agg(quote_literal(lexeme), ' | '), ''))
+                AS tsq
+            FROM unnest(tsvector_to_array(to_tsvector('russian', %(text)s))) AS lexeme
+        ),
+        vector_hits AS (
+            SELECT id, row_number() OVER (ORDER BY distance, id) AS rank
+            FROM (
+                SELECT id, {column} {operator} %(vector)s::{vector_type} AS distance
+                FROM {table}
+                WHERE {column} IS NOT NULL
+                ORDER BY {column} {operator} %(vector)s::{vector_type}
+                LIMIT %(candidates)s
+            ) nearest
+        ),
+        text_hits AS (
+            SELECT id, row_number() OVER (ORDER BY score DESC, id) AS rank
+            FROM (
+                SELECT e.id, ts_rank_cd(e.search_vector, query.tsq) AS score
+                FROM {table} e, query
+                WHERE e.search_vector @@ query.tsq AND e.{column} IS NOT NULL
+                ORDER BY score DESC
+                LIMIT %(candidates)s
+            ) matched
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (%(rrf_k)s + rank)) AS rrf_score
+            FROM (
+                SELECT * FROM vector_hits UNION ALL SELECT * FROM text_hits
+            ) hits
+            GROUP BY id
+        )
+        SELECT e.id, e.raw_text, e.parent_id, fused.rrf_score
+        FROM fused JOIN {table} e ON e.id = fused.id
+        ORDER BY fused.rrf_score DESC, e.id
+        LIMIT %(top_k)s
+    """
+
+    def search(
+        self,
+        query,
+        top_k=5,
+        text=None,
+        ef_search=None,
+        probes=None,
+        candidates=None,
+        **kwargs,
+    ) -> List[Embedding]:
+        if not (text or "").strip():
+            return get_search_backend("pgvector").search(
+                query, top_k, ef_search=ef_search, probes=probes
+            )
+
+        column = settings.RAG_SEARCH_COLUMN
+        if column == "embedded_halfvec":
+            vector, vector_type = HalfVector(query).to_text(), "halfvec"
+        else:
+            vector, vector_type = Vector(query).to_text(), "vector"
+        sql = self.SQL.format(
+            table=Embedding._meta.db_table,
+            column=Embedding._meta.get_field(column).column,
+            operator=DISTANCE_OPERATORS[settings.RAG_SEARCH_DISTANCE],
+            vector_type=vector_type,
+        )
+        candidates = candidates or settings.RAG_HYBRID_CANDIDATES
+        params = {
+            "text": text,
+            "vector": vector,
+            "candidates": candidates,
+            "rrf_k": settings.RAG_HYBRID_RRF_K,
+            "top_k": top_k,
+        }
+
+        # an HNSW scan returns at most ef_search rows (pgvector default 40)
+        ef_search = max(ef_search or settings.VECTOR_SEARCH_EF_SEARCH or 0, candidates)
+        with transaction.atomic():
+            _tune_vector_search(ef_search, probes)
+            return list(Embedding.objects.raw(sql, params))
+
+
+class InMemoryBackend:
+    """Nearest neighbours from the per-process NumPy index, no DB round trip."""
+
+    def search(self, query, top_k=5, **kwargs) -> List[Embedding]:
+        from .vector_index import get_vector_index
+
+        # only id and raw_text are loaded; other fields stay deferred
+        return [
+            Embedding.from_db(connection.alias, ["id", "raw_text"], (pk, raw_text))
+            for pk, raw_text, _score in get_vector_index().search(query, top_k)
+        ]
 
 
-def search_documents(query, top_k=5):
-    return list(
-        Embedding.objects.order_by(CosineDistance("embedded_vector", query))[:top_k]
-    )
+SEARCH_BACKENDS = {
+    "pgvector": PgVectorBackend,
+    "hybrid": HybridBackend,
+    "memory": InMemoryBackend,
+}
+
+_backends = {}
+
+
+def get_search_backend(name: Optional[str] = None):
+    name = name or settings.RAG_SEARCH_BACKEND
+    if name not in _backends:
+        try:
+            _backends[name] = SEARCH_BACKENDS[name]()
+        except KeyError:
+            raise ValueError(f"Unknown RAG_SEARCH_BACKEND: {name!r}")
+    return _backends[name]
+
+
+def search_documents(query, top_k=5, backend=None, **options):
+    return get_search_backend(backend).search(query, top_k, **options)
 
 
 import asyncio
 from .embeddings import get_embedding_async  # your async/sync function
 
 
-async def search_documents_async(query, top_k=5):
+async def search_documents_async(query, top_k=5, backend=None, **options):
 
     def run_query():
-        return list(
-            Embedding.objects.order_by(CosineDistance("embedded_vector", query))[:top_k]
-        )
+        return search_documents(query, top_k, backend, **options)
 
     return await asyncio.to_thread(run_query)
@@ -2,11 +2,13 @@ from django.conf import settings
 import json
 from openai import AsyncOpenAI, OpenAI
 from rag_system.models import Embedding, Roles
+from .chunking import token_length
+from .db import release_db_connection
 from .gpt_rules import get_utils, get_utils_async
 
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from rag_system.models import Utils
-from miniapp.models import ChatSession
+from miniapp.models import ChatSession, Message
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,13 +44,12 @@ def skynet_answer(user_prompt: str, session_object: ChatSession) -> str:
 
     logger.info("skynet simple answers")
     utils: Utils = get_utils()
-    inputs = session_object.get_last_summarization_history_v2()
-    response = client_sync.responses.create(
-        model=utils.gpt_model,
-        input=[
-            {
-                "role": "system",
-                "content": f"""
+    summary, turns = session_object.get_skynet_history()
+    inputs = skynet_history_input(summary, turns)
+    messages = [
+        {
+            "role": "system",
+            "content": f"""
 {session_object.current_role.behaviour}
 ACTIVE CHARACTER PORTRAIT START:
 {session_object.current_role.portret}
@@ -63,9 +64,13 @@ ACTIVE CHARACTER PORTRAIT END.
 - Use blockquotes (`>`) for highlighting key user questions or statements.
 
 """,
-            },
-            *inputs,
-        ],
+        },
+        *inputs,
+    ]
+    release_db_connection()
+    response = client_sync.responses.create(
+        model=utils.gpt_model,
+        input=messages,
     )
     for item in response.output:
         if hasattr(item, "content") and item.content:
@@ -119,12 +124,10 @@ def skynet_summarize(session_object: ChatSession) -> str:
     if len(inputs) <= 10:
         return """Чтобы оценить разговор, нужно сначала немного пообщаться.
 Если хочешь снова перейти в режим тренировки, нажми кнопку в левом нижнем углу."""
-    response = client_sync.responses.create(
-        model=utils.gpt_model,
-        input=[
-            {
-                "role": "system",
-                "content": f"""
+    messages = [
+        {
+            "role": "system",
+            "content": f"""
 
 **Use Markdown to format your response for clarity and emphasis:**
 - Use **bold** for emphasis (e.g., **important points**).
@@ -135,12 +138,96 @@ def skynet_summarize(session_object: ChatSession) -> str:
 - Use blockquotes (`>`) for highlighting key user questions or statements.
 {session_object.current_role.summarize_behaviour}
 """,
-            },
-            *inputs,
-        ],
+        },
+        *inputs,
+    ]
+    release_db_connection()
+    response = client_sync.responses.create(
+        model=utils.gpt_model,
+        input=messages,
     )
 
     for item in response.output:
         if hasattr(item, "content") and item.content:
             return item.content[0].text
     return None
+
+
+SUMMARY_PROMPT = """You compress a sales-training role-play between a trainee
+(the user) and a character played by the assistant. Write a concise summary in
+the language of the conversation that keeps everything needed to continue it
+in character: who the character is, what the trainee offered or asked, the
+character's objections, questions, promises and current attitude, and any
+names, numbers or agreements. Merge the previous summary, if given, with the
+new turns. Output only the summary."""
+
+
+def _role(message: Message) -> str:
+    return "user" if message.owner == "user" else "assistant"
+
+
+def skynet_history_input(summary: Optional[Message], turns: List[Message]) -> list:
+    inputs = []
+    if summary is not None:
+        inputs.append(
+            {
+                "role": "system",
+                "content": f"CONVERSATION SO FAR (SUMMARY):\n{summary.message}",
+            }
+        )
+    inputs.extend({"role": _role(turn), "content": turn.message} for turn in turns)
+    return inputs
+
+
+def skynet_history_tokens(turns: List[Message]) -> int:
+    return sum(token_length(turn.message or "") for turn in turns)
+
+
+def skynet_compress_history(session_object: ChatSession) -> Optional[Message]:
+    """
+    Fold the older role-play turns into a new rolling summary message,
+    keeping the newest SKYNET_SUMMARY_KEEP_TOKENS of turns verbatim.
+    Returns the summary, or None when there was nothing to compress.
+    """
+    summary, turns = session_object.get_skynet_history()
+    kept = 0
+    split = len(turns)
+    while split > 0:
+        size = token_length(turns[split - 1].message or "")
+        if kept + size > settings.SKYNET_SUMMARY_KEEP_TOKENS:
+            break
+        kept += size
+        split -= 1
+    older = turns[:split]
+    if not older:
+        return None
+
+    transcript = "\n".join(
+        f"{'TRAINEE' if _role(turn) == 'user' else 'CHARACTER'}: {turn.message}"
+        for turn in older
+    )
+    previous = f"PREVIOUS SUMMARY:\n{summary.message}\n\n" if summary else ""
+    utils: Utils = get_utils()
+    release_db_connection()
+    response = client_sync.responses.create(
+        model=utils.gpt_model,
+        input=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"{previous}NEW TURNS:\n{transcript}"},
+        ],
+    )
+    text = response.output_text
+    if not text:
+        return None
+    logger.info(
+        "Session %s: %s turns folded into the role-play summary",
+        session_object.pk,
+        len(older),
+    )
+    return Message.objects.create(
+        session=session_object,
+        owner="system",
+        message=text,
+        is_summary=True,
+        summary_until=older[-1],
+    )
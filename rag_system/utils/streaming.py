@@ -0,0 +1,52 @@
+# rag_system/utils/streaming.py
+import json
+import re
+
+_ANSWER_START = re.compile(r'"answer"\s*:\s*"')
+# escapes that cannot be decoded yet: a lone backslash, a partial \uXXXX,
+# or a high surrogate still waiting for its low half
+_INCOMPLETE_ESCAPE = re.compile(
+    r"(?<!\\)(?:\\\\)*(\\|\\u[0-9a-fA-F]{0,3}|\\u[dD][89abAB][0-9a-fA-F]{2})$"
+)
+
+
+class AnswerDeltaExtractor:
+    """
+    Pull the text of the "answer" field out of streamed function-call
+    arguments (a JSON object arriving in fragments), so it can be shown
+    before the arguments are complete.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._start = None
+        self._emitted = 0
+        self.done = False
+
+    def feed(self, fragment: str) -> str:
+        """Add a fragment; return the answer text decoded since the last call."""
+        if self.done:
+            return ""
+        self._buffer += fragment
+        if self._start is None:
+            match = _ANSWER_START.search(self._buffer)
+            if not match:
+                return ""
+            self._start = match.end()
+
+        body = self._buffer[self._start :]
+        end = re.search(r'(?<!\\)(?:\\\\)*"', body)
+        if end:
+            body = body[: end.end() - 1]
+            self.done = True
+        else:
+            # cutting a partial escape can expose a high surrogate before it
+            incomplete = _INCOMPLETE_ESCAPE.search(body)
+            while incomplete:
+                body = body[: incomplete.start(1)]
+                incomplete = _INCOMPLETE_ESCAPE.search(body)
+
+        text = json.loads(f'"{body}"')
+        delta = text[self._emitted :]
+        self._emitted = len(text)
+        return delta
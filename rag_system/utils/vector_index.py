@@ -0,0 +1,169 @@
+# rag_system/utils/vector_index.py
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import redis
+from django.conf import settings
+
+from rag_system.models import Embedding
+from .kb_version import get_changes_since
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class InMemoryVectorIndex:
+    """
+    All Embedding vectors in one contiguous, L2-normalized float32 matrix.
+    Top-k is a single matrix-vector product plus argpartition; rows are
+    patched incrementally from the knowledge-base change log.
+    """
+
+    def __init__(self, dimensions: int = 768):
+        self.dimensions = dimensions
+        self._lock = threading.RLock()
+        # (ids, matrix, texts) is swapped as a whole, so searches never lock
+        self._data: Tuple[np.ndarray, np.ndarray, List[str]] = (
+            np.empty(0, dtype=np.int64),
+            np.empty((0, dimensions), dtype=np.float32),
+            [],
+        )
+        self._row_of: Dict[int, int] = {}
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    def __len__(self):
+        return len(self._data[0])
+
+    # ------------------------------- loading -------------------------------
+
+    def _fetch(self, ids: Optional[Sequence[int]] = None):
+        qs = Embedding.objects.exclude(embedded_vector=None)
+        if ids is not None:
+            qs = qs.filter(id__in=ids)
+        return list(qs.values_list("id", "raw_text", "embedded_vector"))
+
+    def _set_rows(self, rows):
+        ids = np.fromiter((pk for pk, _, _ in rows), dtype=np.int64)
+        texts = [text for _, text, _ in rows]
+        if rows:
+            matrix = np.vstack([np.asarray(v, dtype=np.float32) for _, _, v in rows])
+            matrix = np.ascontiguousarray(_normalize_rows(matrix))
+        else:
+            matrix = np.empty((0, self.dimensions), dtype=np.float32)
+        with self._lock:
+            self._data = (ids, matrix, texts)
+            self._row_of = {int(pk): i for i, pk in enumerate(ids)}
+
+    def load(self, version: Optional[int] = None):
+        rows = self._fetch()
+        self._set_rows(rows)
+        with self._lock:
+            self._version = version
+            self._loaded_at = time.monotonic()
+        logger.info("In-memory vector index loaded: %s rows", len(rows))
+
+    def apply_changes(self, ids: Sequence[int]):
+        rows = {pk: (text, vector) for pk, text, vector in self._fetch(ids)}
+        with self._lock:
+            current_ids, matrix, texts = self._data
+            removed = [self._row_of[pk] for pk in ids if pk in self._row_of]
+            if removed:
+                keep = np.ones(len(current_ids), dtype=bool)
+                keep[removed] = False
+                current_ids = current_ids[keep]
+                matrix = matrix[keep]
+                texts = [t for t, k in zip(texts, keep) if k]
+
+            if rows:
+                new_matrix = _normalize_rows(
+                    np.vstack([np.asarray(v, dtype=np.float32) for _, v in rows.values()])
+                )
+                current_ids = np.concatenate(
+                    [current_ids, np.fromiter(rows.keys(), dtype=np.int64)]
+                )
+                matrix = np.vstack([matrix, new_matrix])
+                texts = texts + [text for text, _ in rows.values()]
+
+            self._data = (current_ids, np.ascontiguousarray(matrix), texts)
+            self._row_of = {int(pk): i for i, pk in enumerate(current_ids)}
+        logger.info("In-memory vector index patched: %s changed rows", len(ids))
+
+    def refresh(self):
+        """Catch up with the change log, at most once per check interval."""
+        now = time.monotonic()
+        if now - self._checked_at < settings.RAG_MEMORY_INDEX_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._checked_at < settings.RAG_MEMORY_INDEX_CHECK_INTERVAL:
+                return
+            self._checked_at = now
+
+            if self._version is None:
+                try:
+                    version, _ = get_changes_since(0)
+                except redis.RedisError:
+                    version = None
+                # without the change log, fall back to periodic full reloads
+                if (
+                    version is not None
+                    or not self._loaded_at
+                    or now - self._loaded_at > settings.RAG_MEMORY_INDEX_MAX_AGE
+                ):
+                    self.load(version)
+                return
+
+            try:
+                version, changed = get_changes_since(self._version)
+            except redis.RedisError as exc:
+                logger.warning("Knowledge-base change log unavailable: %s", exc)
+                self._version = None
+                return
+            if changed is None:
+                self.load(version)
+            elif changed:
+                self.apply_changes(changed)
+                self._version = version
+
+    # ------------------------------- search --------------------------------
+
+    def search(self, query, top_k: int = 5) -> List[Tuple[int, str, float]]:
+        self.refresh()
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+
+        ids, matrix, texts = self._data
+        if not len(ids):
+            return []
+
+        scores = matrix @ q
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), texts[i], float(scores[i])) for i in top]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> InMemoryVectorIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = InMemoryVectorIndex(
+                    Embedding._meta.get_field("embedded_vector").dimensions
+                )
+    return _index
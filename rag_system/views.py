@@ -3,10 +3,11 @@ from django.shortcuts import render
 # Create your views here.
 
 from rest_framework import views
+from rag_system.utils.embeddings import get_query_embedding
 from rag_system.utils.search import search_documents
 from rag_system.serializers import EmbeddingSerializer, RolesSerializer
 from rest_framework.views import APIView, Response
-from rag_system.models import Roles
+from rag_system.utils.gpt_rules import get_roles
 
 
 class EmbeddingSearch(views.APIView):
@@ -19,7 +20,7 @@ class EmbeddingSearch(views.APIView):
             return views.Response(
                 {"status": "error"}, status=views.status.HTTP_400_BAD_REQUEST
             )
-        data = search_documents(prompt)
+        data = search_documents(get_query_embedding(prompt), text=prompt)
         print(data)
         return views.Response(
             data=EmbeddingSerializer(data, many=True).data,
@@ -30,6 +31,6 @@ class EmbeddingSearch(views.APIView):
 class GetRolesView(APIView):
 
     def post(self, request, *args, **kwargs):
-        roles = Roles.objects.all()
+        roles = get_roles()
 
         return Response(data=RolesSerializer(roles, many=True).data)
@@ -1,8 +1,17 @@
+from aiogram import types
 from django.conf import settings
 from telegram.instance import instance_main
+from telegram.instance.update_queue import update_queue
 
 
 class BotFeedPasser:
     @classmethod
     async def feed_pass(cls, token: str, update: dict):
         await instance_main.feed_update(token=token, update=update)
+
+    @classmethod
+    async def enqueue(cls, token: str, update: types.Update) -> bool:
+        """Hand the update to the worker pool; False when it is saturated."""
+        return await update_queue.submit(
+            token, update, timeout=settings.TELEGRAM_UPDATE_ENQUEUE_TIMEOUT
+        )
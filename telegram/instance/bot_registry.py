@@ -0,0 +1,72 @@
+# telegram/instance/bot_registry.py
+"""
+Process-lifetime aiogram Bots sharing one pooled AiohttpSession, so replies
+reuse keep-alive connections to the Telegram API instead of paying TCP+TLS
+setup per update. Opened on ASGI lifespan startup (core.asgi) and closed on
+shutdown; get() also opens it lazily for servers without lifespan events.
+"""
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BotRegistry:
+
+    def __init__(self):
+        # an aiohttp session belongs to the loop that opened it, so sessions
+        # (and the bots on them) are kept per event loop
+        self._sessions: Dict[asyncio.AbstractEventLoop, AiohttpSession] = {}
+        self._bots: Dict[Tuple[asyncio.AbstractEventLoop, str], Bot] = {}
+
+    def _new_session(self) -> AiohttpSession:
+        return AiohttpSession(
+            limit=settings.TELEGRAM_HTTP_POOL_LIMIT,
+            timeout=settings.TELEGRAM_HTTP_TIMEOUT,
+        )
+
+    def get(self, token: str) -> Bot:
+        loop = asyncio.get_running_loop()
+        self._forget_closed_loops()
+        session = self._sessions.get(loop)
+        if session is None:
+            session = self._sessions[loop] = self._new_session()
+        bot = self._bots.get((loop, token))
+        if bot is None:
+            bot = self._bots[(loop, token)] = Bot(token=token, session=session)
+        return bot
+
+    def _forget_closed_loops(self):
+        # a closed loop already dropped its transports; nothing left to await
+        for loop in [loop for loop in self._sessions if loop.is_closed()]:
+            del self._sessions[loop]
+        for key in [key for key in self._bots if key[0].is_closed()]:
+            del self._bots[key]
+
+    async def startup(self):
+        if settings.BOT_TOKEN:
+            self.get(settings.BOT_TOKEN)
+            logger.info("Telegram bot session opened")
+
+    async def close(self):
+        """Close the sessions of this loop and of any other still running loop."""
+        current = asyncio.get_running_loop()
+        sessions, self._sessions = self._sessions, {}
+        self._bots = {}
+        for loop, session in sessions.items():
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(session.close(), loop)
+                )
+        if sessions:
+            logger.info("Telegram bot session closed")
+
+
+bot_registry = BotRegistry()
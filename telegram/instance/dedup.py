@@ -0,0 +1,47 @@
+# telegram/instance/dedup.py
+"""
+Idempotency for webhook retries: an update_id is claimed with SET NX EX
+before it is handled, so a redelivered update is acknowledged and skipped.
+When the webhook answers with an error (inline handling failed, or the
+queue rejected the update with 503) the claim is released so Telegram's
+retry is processed. A queued update was already answered 200 and is never
+retried, so its claim stays even if the handlers fail.
+"""
+import logging
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+UPDATE_KEY = "telegram:update:{}"
+
+
+def _redis():
+    # the aiogram FSM client (redis.asyncio, db 2), already bound to this loop
+    from telegram.instance.instance_main import redis_client
+
+    return redis_client
+
+
+async def claim_update(update_id: int) -> bool:
+    """True if this update was not seen before (or Redis is unavailable)."""
+    try:
+        return bool(
+            await _redis().set(
+                UPDATE_KEY.format(update_id),
+                1,
+                nx=True,
+                ex=settings.TELEGRAM_UPDATE_DEDUP_TTL,
+            )
+        )
+    except RedisError as exc:
+        logger.warning("Update dedup unavailable: %s", exc)
+        return True
+
+
+async def release_update(update_id: int):
+    try:
+        await _redis().delete(UPDATE_KEY.format(update_id))
+    except RedisError as exc:
+        logger.warning("Could not release update %s: %s", update_id, exc)
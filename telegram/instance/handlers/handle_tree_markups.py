@@ -9,6 +9,7 @@ from telegram.instance.filters.tree_filter import TreeButtonsOnly
 from telegram.instance.middlewares import BotClientSessionMiddleWare
 from telegram.models.buttonTree import AttachmentData, AttachmentToButton
 from telegram_client.models import BotClientSession, BotClient
+from telegram_client.session_context import aforget_session_context
 from telegram.models import ButtonTree
 from telegram.instance.markup_buttons import reply_markup_builder_from_model
 import logging
@@ -77,6 +78,7 @@ async def give_parent_tree(message: types.Message, bot: Bot, from_back: bool = F
             client_session = await BotClientSession.objects.filter(
                 client__chat_id=message.from_user.id
             ).aupdate(current_button=None)
+            await aforget_session_context(message.from_user.id)
 
         # When user returns from "Назад", don't show the greeting again
         except Exception as e:
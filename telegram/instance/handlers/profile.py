@@ -5,6 +5,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 
 from telegram_client.models import BotClient
+from telegram_client.session_context import aforget_session_context
 from .handle_start_flow import give_parent_tree
 
 profile_router = Router()  # <— Роутер профиля
@@ -113,6 +114,7 @@ async def confirm_exit(message: types.Message, bot: Bot, state: FSMContext):
     bot_client = await BotClient.objects.filter(chat_id=message.from_user.id).afirst()
     if bot_client:
         await BotClient.objects.filter(pk=bot_client.pk).aupdate(is_logined=False)
+        await aforget_session_context(bot_client.chat_id)
     await state.clear()
     return await message.answer(
         "Вы вышли из аккаунта, нажмите кнопку /start, чтобы начать работу",
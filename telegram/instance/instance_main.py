@@ -1,9 +1,10 @@
-from aiogram import Bot, Dispatcher, types
+from aiogram import Dispatcher, types
 from aiogram.fsm.storage.redis import RedisStorage
 import redis.asyncio as redis
 from aiogram.filters import CommandStart
 import os
 from telegram.instance import handlers
+from telegram.instance.bot_registry import bot_registry
 
 # Use the same Redis config from your Django settings
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")  # docker service name
@@ -28,10 +29,11 @@ webhook_dp.include_routers(
 )
 
 
+async def process_update(token: str, update: types.Update):
+    # the bot and its pooled HTTP session outlive the update
+    bot = bot_registry.get(token)
+    await webhook_dp.feed_update(bot=bot, update=update)
+
+
 async def feed_update(token: str, update: dict):
-    bot = Bot(token=token)
-    try:
-        aiogram_update = types.Update(**update)
-        await webhook_dp.feed_update(bot=bot, update=aiogram_update)
-    finally:
-        await bot.session.close()
+    await process_update(token, types.Update(**update))
@@ -1,7 +1,15 @@
+from contextvars import ContextVar
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from typing import Callable, Awaitable, Any, Dict
-from telegram_client.models import BotClient, BotClientSession
+from typing import Callable, Awaitable, Any, Dict, Optional, Tuple
+from telegram_client.models import BotClientSession
+from telegram_client.session_context import aget_session_context
+
+# (update_id, session) of the update being handled: the middleware sits on
+# several routers and the context is loaded once per update
+_update_session: ContextVar[Optional[Tuple[int, BotClientSession]]] = ContextVar(
+    "update_session", default=None
+)
 
 
 class BotClientSessionMiddleWare(BaseMiddleware):
@@ -13,17 +21,15 @@ class BotClientSessionMiddleWare(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
 
-        bot_client, _ = await BotClient.objects.aget_or_create(
-            chat_id=int(event.from_user.id)
-        )
-        bot_client_session, _ = await BotClientSession.objects.aget_or_create(
-            client=bot_client
-        )
-        bot_client_session = await BotClientSession.objects.select_related(
-            "client", "current_button"
-        ).aget(  # joins in one query
-            pk=bot_client_session.pk
-        )
+        update = data.get("event_update")
+        update_id = update.update_id if update is not None else None
+        current = _update_session.get()
+        if update_id is not None and current is not None and current[0] == update_id:
+            bot_client_session = current[1]
+        else:
+            # the per-chat cache, else one SELECT join (new chats insert first)
+            bot_client_session = await aget_session_context(int(event.from_user.id))
+            _update_session.set((update_id, bot_client_session))
 
         data["session"] = bot_client_session
         data["client"] = bot_client_session.client  # optional shortcut
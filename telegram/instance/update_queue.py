@@ -0,0 +1,238 @@
+# telegram/instance/update_queue.py
+"""
+In-process queue between the webhook and the dispatcher.
+
+The webhook validates an update, enqueues it and answers Telegram at once;
+a fixed pool of asyncio workers runs webhook_dp. Every chat is pinned to one
+worker (chat id modulo the pool size), so updates of a chat are handled in
+arrival order while different chats run concurrently. Each worker queue is
+bounded: when it is full the webhook waits up to
+TELEGRAM_UPDATE_ENQUEUE_TIMEOUT for room, which slows Telegram's delivery
+instead of piling up work, and answers 503 after that (Telegram redelivers).
+
+The worker pinning only orders updates inside one process, and Telegram
+sends a chat's next update as soon as the previous one is answered, so with
+several replicas it could land on another process and run alongside the
+previous one. A process therefore takes a Redis lease on the chat
+(telegram:chat:<id>, db 2) before queueing and keeps it while any update of
+that chat is queued or running there; other processes wait for the lease
+within the same enqueue timeout and answer 503 when it is not freed. The
+lease expires after TELEGRAM_CHAT_LEASE_TTL, so a handler running longer
+than that is no longer exclusive.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from aiogram import types
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from prometheus_client import Counter, Gauge, Histogram
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = Gauge(
+    "telegram_update_queue_depth", "Updates waiting for a dispatcher worker"
+)
+UPDATES = Counter(
+    "telegram_updates_total",
+    "Webhook updates by outcome",
+    ["result"],  # processed, failed, rejected
+)
+QUEUE_WAIT = Histogram(
+    "telegram_update_queue_wait_seconds", "Time an update waited in the queue"
+)
+HANDLE_TIME = Histogram(
+    "telegram_update_handle_seconds",
+    "Dispatcher time per update",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+def chat_key(update: types.Update) -> int:
+    """The chat an update belongs to, for ordering; falls back to the sender."""
+    try:
+        event = update.event
+    except LookupError:  # update type aiogram does not know
+        return update.update_id
+    chat = getattr(event, "chat", None) or getattr(
+        getattr(event, "message", None), "chat", None
+    )
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else update.update_id
+
+
+CHAT_LEASE_KEY = "telegram:chat:{}"
+
+# delete the lease only while this process still owns it
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _redis():
+    # the aiogram FSM client (redis.asyncio, db 2), already bound to this loop
+    from telegram.instance.instance_main import redis_client
+
+    return redis_client
+
+
+class ChatLeases:
+    """Per-chat ownership across processes, counted per queued update."""
+
+    poll_interval = 0.05
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.owner = uuid.uuid4().hex
+        self._held: Dict[int, int] = {}
+
+    async def acquire(self, chat: int, timeout: Optional[float]) -> bool:
+        """False if another process kept the chat for ``timeout`` s."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        key = CHAT_LEASE_KEY.format(chat)
+        while True:
+            if chat in self._held:
+                self._held[chat] += 1
+                return True
+            try:
+                acquired = await _redis().set(key, self.owner, nx=True, ex=self.ttl)
+            except RedisError as exc:
+                logger.warning("Chat lease unavailable: %s", exc)
+                acquired = True
+            if chat in self._held:  # taken by this process meanwhile
+                continue
+            if acquired:
+                self._held[chat] = 1
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
+
+    async def release(self, chat: int):
+        count = self._held.get(chat, 0) - 1
+        if count > 0:
+            self._held[chat] = count
+            return
+        self._held.pop(chat, None)
+        try:
+            await _redis().eval(_RELEASE, 1, CHAT_LEASE_KEY.format(chat), self.owner)
+        except RedisError as exc:
+            logger.warning("Could not release chat %s: %s", chat, exc)
+
+    async def release_all(self):
+        for chat in list(self._held):
+            self._held[chat] = 1
+            await self.release(chat)
+
+
+class UpdateQueue:
+
+    def __init__(self, workers: int, queue_size: int, lease_ttl: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.leases = ChatLeases(lease_ttl)
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._loop = None
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queues = [asyncio.Queue(self.queue_size) for _ in range(self.workers)]
+        self._tasks = [
+            loop.create_task(self._work(queue), name=f"telegram-update-worker-{i}")
+            for i, queue in enumerate(self._queues)
+        ]
+
+    async def start(self):
+        self._ensure_started()
+
+    async def submit(
+        self, token: str, update: types.Update, timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Queue the update; False if another process kept its chat or its
+        worker stayed full for ``timeout`` s.
+        """
+        self._ensure_started()
+        chat = chat_key(update)
+        started = time.monotonic()
+        if not await self.leases.acquire(chat, timeout):
+            UPDATES.labels("rejected").inc()
+            return False
+        if timeout is not None:
+            timeout = max(timeout - (time.monotonic() - started), 0)
+        queue = self._queues[chat % self.workers]
+        item = (token, update, chat, time.monotonic())
+        try:
+            await asyncio.wait_for(queue.put(item), timeout)
+        except asyncio.TimeoutError:
+            UPDATES.labels("rejected").inc()
+            await self.leases.release(chat)
+            return False
+        QUEUE_DEPTH.inc()
+        return True
+
+    async def _work(self, queue: asyncio.Queue):
+        from telegram.instance.instance_main import process_update
+
+        while True:
+            token, update, chat, queued_at = await queue.get()
+            QUEUE_DEPTH.dec()
+            QUEUE_WAIT.observe(time.monotonic() - queued_at)
+            started = time.monotonic()
+            try:
+                await process_update(token, update)
+                UPDATES.labels("processed").inc()
+            except Exception:
+                # already answered 200, so Telegram will not retry it; the
+                # dedup claim stays and marks the update as handled
+                UPDATES.labels("failed").inc()
+                logger.exception("Update %s failed", update.update_id)
+            finally:
+                HANDLE_TIME.observe(time.monotonic() - started)
+                await self.leases.release(chat)
+                queue.task_done()
+                # what request_finished does for requests
+                await sync_to_async(close_old_connections)()
+
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def close(self, timeout: float):
+        """Let the workers drain what is queued, then stop them."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %s queued updates on shutdown", self.pending())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # chats of the dropped updates
+        await self.leases.release_all()
+        self._tasks = []
+        self._queues = []
+        self._loop = None
+
+
+update_queue = UpdateQueue(
+    workers=settings.TELEGRAM_UPDATE_WORKERS,
+    queue_size=settings.TELEGRAM_UPDATE_QUEUE_SIZE,
+    lease_ttl=settings.TELEGRAM_CHAT_LEASE_TTL,
+)
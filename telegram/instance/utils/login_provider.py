@@ -1,6 +1,7 @@
 import httpx
 import asyncio
 from telegram_client.models import BotClient, BotClientSession
+from telegram_client.session_context import aforget_session_context
 
 
 async def login_post(access_parameter: str, password: str):
@@ -19,9 +20,12 @@ async def fill_and_activate_user(data, chat_id):
     grade = data["client_partner"]["bonus_system_data"]["grade"]
     id = data["client_partner"]["main_user_data"]["id"]
     bot_client = await BotClient.objects.filter(chat_id=chat_id).afirst()
-    await BotClient.objects.filter(client_id=id).exclude(chat_id=chat_id).aupdate(
-        ai_access=False
-    )
+    other_clients = BotClient.objects.filter(client_id=id).exclude(chat_id=chat_id)
+    other_chat_ids = [
+        other async for other in other_clients.values_list("chat_id", flat=True)
+    ]
+    await other_clients.aupdate(ai_access=False)
+    await aforget_session_context(*other_chat_ids)
     await bot_client.aupdate_fields(
         is_logined=True,
         phone_number=phone_number,
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import signal
+
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram.instance.bot_registry import bot_registry
+from telegram.instance.dedup import claim_update, release_update
+from telegram.instance.instance_main import webhook_dp
+from telegram.instance.update_queue import UpdateQueue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Run the bot with long polling instead of the webhook: same dispatcher, "
+        "routers and middleware, updates handled by a per-chat ordered worker pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TELEGRAM_UPDATE_WORKERS,
+            help="dispatcher workers (updates of one chat stay in order)",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=settings.TELEGRAM_UPDATE_QUEUE_SIZE,
+            help="pending updates per worker before polling pauses",
+        )
+        parser.add_argument("--polling-timeout", type=int, default=30)
+        parser.add_argument(
+            "--drain-timeout",
+            type=float,
+            default=settings.TELEGRAM_UPDATE_DRAIN_TIMEOUT,
+            help="seconds to finish queued updates on shutdown",
+        )
+        parser.add_argument(
+            "--delete-webhook",
+            action="store_true",
+            help="remove the webhook first (Telegram refuses polling while one is set)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.BOT_TOKEN:
+            raise CommandError("BOT_TOKEN is not set")
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        token = settings.BOT_TOKEN
+        bot = bot_registry.get(token)
+        queue = UpdateQueue(
+            workers=options["concurrency"], queue_size=options["queue_size"]
+        )
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        if options["delete_webhook"]:
+            await bot.delete_webhook(drop_pending_updates=False)
+        await webhook_dp.emit_startup(bot=bot)
+        await queue.start()
+        me = await bot.get_me()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Polling as @{me.username} with {options['concurrency']} workers"
+            )
+        )
+
+        try:
+            await self._poll(bot, queue, stop, options["polling_timeout"])
+        finally:
+            self.stdout.write("Stopping: finishing queued updates")
+            await queue.close(options["drain_timeout"])
+            await webhook_dp.emit_shutdown(bot=bot)
+            await bot_registry.close()
+
+    async def _poll(self, bot, queue: UpdateQueue, stop: asyncio.Event, timeout: int):
+        allowed_updates = webhook_dp.resolve_used_update_types()
+        stopped = asyncio.ensure_future(stop.wait())
+        offset = None
+        delay = 1.0
+        while not stop.is_set():
+            fetch = asyncio.ensure_future(
+                bot.get_updates(
+                    offset=offset,
+                    timeout=timeout,
+                    allowed_updates=allowed_updates,
+                    request_timeout=timeout + 10,
+                )
+            )
+            await asyncio.wait({fetch, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            if not fetch.done():
+                fetch.cancel()
+                break
+            try:
+                updates = fetch.result()
+            except (TelegramNetworkError, TelegramServerError) as exc:
+                logger.warning("getUpdates failed, retrying in %.0fs: %s", delay, exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            delay = 1.0
+            for update in updates:
+                # a batch redelivered after a restart was already handled
+                if await claim_update(update.update_id):
+                    # blocks while the chat's worker is full: back-pressure
+                    submit = asyncio.ensure_future(queue.submit(bot.token, update))
+                    await asyncio.wait(
+                        {submit, stopped}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not submit.done():
+                        # not confirmed: Telegram delivers it again next run
+                        submit.cancel()
+                        await release_update(update.update_id)
+                        break
+                offset = update.update_id + 1
+        stopped.cancel()
@@ -3,8 +3,11 @@ from django.http import JsonResponse
 import json
 from rest_framework.views import Response, status, APIView
 
+from aiogram import types
 from django.conf import settings
+from pydantic import ValidationError
 from telegram.feed_passer import BotFeedPasser
+from telegram.instance.dedup import claim_update, release_update
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,16 +26,41 @@ async def webhook_async_view(request, bot_id: str):
     if bot_id != settings.BOT_TOKEN.split(":", maxsplit=1)[0]:
         return JsonResponse({"detail": "Bot id is not valid"})
 
+    if settings.TELEGRAM_QUEUE_UPDATES:
+        try:
+            update = types.Update.model_validate_json(request.body)
+        except ValidationError as exc:
+            logger.warning("Invalid update: %s", exc)
+            return JsonResponse(
+                {"detail": "Invalid update"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not await claim_update(update.update_id):
+            return JsonResponse({"status": "duplicate"})
+        # answer now; handlers (LLM calls, file uploads) run in the worker pool
+        if not await BotFeedPasser.enqueue(token=settings.BOT_TOKEN, update=update):
+            await release_update(update.update_id)
+            return JsonResponse(
+                {"status": "busy"}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return JsonResponse({"status": "ok"})
+
     update = request.body.decode("utf-8")
+    update_id = None
 
     try:
         update_data = json.loads(update)
+        update_id = update_data.get("update_id")
+        if update_id is not None and not await claim_update(update_id):
+            return JsonResponse({"status": "duplicate"})
         await BotFeedPasser.feed_pass(token=settings.BOT_TOKEN, update=update_data)
 
         return JsonResponse({"status": "ok"})
 
     except Exception as exc:
         logger.error("Error webhook WebhookApiView: %s", exc)
+        if update_id is not None:
+            # let Telegram's retry run the handlers again
+            await release_update(update_id)
         return JsonResponse(
             {"status": "error", "error": str(exc)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -3,6 +3,7 @@ from django.contrib import admin
 from unfold.admin import ModelAdmin, StackedInline
 
 from .models import BotClient, BotClientSession
+from .session_context import forget_after_commit
 
 
 # ---------- Inlines ----------
@@ -17,24 +18,31 @@ class BotClientSessionInline(StackedInline):
 
 
 # ---------- Actions ----------
+def _update_and_forget(queryset, **fields):
+    # queryset.update() sends no signals; drop the cached session contexts
+    chat_ids = list(queryset.values_list("chat_id", flat=True))
+    queryset.update(**fields)
+    forget_after_commit(*chat_ids)
+
+
 @admin.action(description="✅ Отметить как проверенных")
 def mark_verified(modeladmin, request, queryset):
-    queryset.update(is_verified=True)
+    _update_and_forget(queryset, is_verified=True)
 
 
 @admin.action(description="❌ Снять проверку")
 def unmark_verified(modeladmin, request, queryset):
-    queryset.update(is_verified=False)
+    _update_and_forget(queryset, is_verified=False)
 
 
 @admin.action(description="🔐 Отметить как вошедших")
 def mark_logined(modeladmin, request, queryset):
-    queryset.update(is_logined=True)
+    _update_and_forget(queryset, is_logined=True)
 
 
 @admin.action(description="🚪 Отметить как вышедших")
 def unmark_logined(modeladmin, request, queryset):
-    queryset.update(is_logined=False)
+    _update_and_forget(queryset, is_logined=False)
 
 
 # ---------- Admins ----------
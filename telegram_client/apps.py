@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TelegramClientConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "telegram_client"
+
+    def ready(self):
+        import telegram_client.signals
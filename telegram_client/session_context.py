@@ -0,0 +1,141 @@
+# telegram_client/session_context.py
+"""
+The BotClient + BotClientSession (+ current_button) of a chat, as used by
+BotClientSessionMiddleWare.
+
+A miss is one SELECT joining the client, its session and the current
+button; only a new chat also inserts the missing rows (ON CONFLICT DO
+NOTHING) before selecting again. The result is cached per chat for
+TELEGRAM_SESSION_CACHE_TTL seconds; saves and deletes of the rows drop the
+entry (telegram_client.signals), queryset updates call forget_session_context.
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from telegram.models import ButtonTree
+from telegram_client.models import BotClient, BotClientSession
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_KEY = "tg_session:{}"
+
+
+def _columns(model):
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def _insert_values(model, **values):
+    """Column names and DB values of a new row with the model's defaults."""
+    obj = model(**values)
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    return (
+        [field.column for field in fields],
+        [
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ],
+    )
+
+
+def _from_row(model, row, start):
+    fields = model._meta.concrete_fields
+    values = row[start : start + len(fields)]
+    return model.from_db(
+        connection.alias, [field.attname for field in fields], values
+    ), start + len(fields)
+
+
+def _select(cursor, chat_id: int):
+    cursor.execute(
+        f"""
+        SELECT {", ".join(f"client.{c}" for c in _columns(BotClient))},
+               {", ".join(f"session.{c}" for c in _columns(BotClientSession))},
+               {", ".join(f"button.{c}" for c in _columns(ButtonTree))}
+        FROM {BotClient._meta.db_table} AS client
+        JOIN {BotClientSession._meta.db_table} AS session
+            ON session.client_id = client.id
+        LEFT JOIN {ButtonTree._meta.db_table} AS button
+            ON button.id = session.current_button_id
+        WHERE client.chat_id = %s
+        """,
+        [chat_id],
+    )
+    return cursor.fetchone()
+
+
+def _create(cursor, chat_id: int):
+    """Insert the client and its session if missing (concurrent-safe)."""
+    client_table = BotClient._meta.db_table
+    client_columns, client_values = _insert_values(BotClient, chat_id=chat_id)
+    session_columns, session_values = zip(
+        *(
+            (column, value)
+            for column, value in zip(*_insert_values(BotClientSession, client_id=0))
+            if column != "client_id"
+        )
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {client_table} ({", ".join(client_columns)})
+        VALUES ({", ".join(["%s"] * len(client_values))})
+        ON CONFLICT (chat_id) DO NOTHING
+        """,
+        client_values,
+    )
+    cursor.execute(
+        f"""
+        INSERT INTO {BotClientSession._meta.db_table}
+            (client_id, {", ".join(session_columns)})
+        SELECT id, {", ".join(["%s"] * len(session_values))}
+        FROM {client_table} WHERE chat_id = %s
+        ON CONFLICT (client_id) DO NOTHING
+        """,
+        [*session_values, chat_id],
+    )
+
+
+def _load(chat_id: int) -> BotClientSession:
+    with connection.cursor() as cursor:
+        row = _select(cursor, chat_id)
+        if row is None:
+            with transaction.atomic():
+                _create(cursor, chat_id)
+            row = _select(cursor, chat_id)
+
+    client, start = _from_row(BotClient, row, 0)
+    session, start = _from_row(BotClientSession, row, start)
+    button = None
+    if session.current_button_id is not None:
+        button, _ = _from_row(ButtonTree, row, start)
+    session.client = client
+    session.current_button = button
+    return session
+
+
+async def aget_session_context(chat_id: int) -> BotClientSession:
+    key = CONTEXT_KEY.format(chat_id)
+    session = await cache.aget(key)
+    if session is None:
+        session = await sync_to_async(_load)(chat_id)
+        await cache.aset(key, session, settings.TELEGRAM_SESSION_CACHE_TTL)
+    return session
+
+
+def forget_session_context(*chat_ids: int):
+    if chat_ids:
+        cache.delete_many([CONTEXT_KEY.format(chat_id) for chat_id in chat_ids])
+
+
+async def aforget_session_context(*chat_ids: int):
+    if chat_ids:
+        await cache.adelete_many([CONTEXT_KEY.format(chat_id) for chat_id in chat_ids])
+
+
+def forget_after_commit(*chat_ids: int):
+    # now and after commit: a reader between the two must not re-cache old rows
+    forget_session_context(*chat_ids)
+    transaction.on_commit(lambda: forget_session_context(*chat_ids))
@@ -0,0 +1,41 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from telegram.models import ButtonTree
+from telegram_client.models import BotClient, BotClientSession
+from telegram_client.session_context import forget_after_commit
+
+
+@receiver(post_save, sender=BotClient)
+@receiver(post_delete, sender=BotClient)
+def bot_client_changed(sender, instance, **kwargs):
+    forget_after_commit(instance.chat_id)
+
+
+@receiver(post_save, sender=BotClientSession)
+@receiver(post_delete, sender=BotClientSession)
+def bot_client_session_changed(sender, instance, **kwargs):
+    if BotClientSession.client.is_cached(instance):
+        chat_id = instance.client.chat_id
+    else:
+        chat_id = (
+            BotClient.objects.filter(pk=instance.client_id)
+            .values_list("chat_id", flat=True)
+            .first()
+        )
+    if chat_id is not None:
+        forget_after_commit(chat_id)
+
+
+@receiver(post_save, sender=ButtonTree)
+@receiver(pre_delete, sender=ButtonTree)
+def button_changed(sender, instance, **kwargs):
+    # sessions cache their current button
+    chat_ids = list(
+        BotClientSession.objects.filter(current_button=instance).values_list(
+            "client__chat_id", flat=True
+        )
+    )
+    if chat_ids:
+        forget_after_commit(*chat_ids)